@@ -1,17 +1,36 @@
 import os
+import sys
+import logging
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+
+try:
+    # orjson sérialise directement en bytes, bien plus vite que l'encodeur json standard
+    import orjson  # noqa: F401
+    from fastapi.responses import ORJSONResponse as DefaultResponse
+except ImportError:
+    DefaultResponse = JSONResponse
 
 from replay_analyzer.api.endpoints import setup_routes
 from replay_analyzer.utils.helpers import create_directory_if_not_exists
 
 
+# Journalisation sur la sortie standard, au même format que les anciens print [INFO]/[ERROR];
+# niveau réglable par la variable d'environnement LOG_LEVEL (INFO par défaut)
+logging.basicConfig(
+    level=os.environ.get("LOG_LEVEL", "INFO").upper(),
+    stream=sys.stdout,
+    format="[%(levelname)s] %(message)s"
+)
+
 # Créer l'application FastAPI
 app = FastAPI(
     title="Rocket League Replay Analyzer API",
     description="API pour analyser les fichiers replay de Rocket League",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=DefaultResponse
 )
 
 # Configurer CORS
@@ -1,16 +1,40 @@
-import asyncio
 import os
-import traceback
+import logging
+import time
+import asyncio
 import json
-from typing import Dict, Any
+from functools import lru_cache
+from typing import Dict, Any, Tuple, FrozenSet
 
 from replay_analyzer.utils.binary import BinaryFramesWriter
-from replay_analyzer.extractors.frames import extract_frames_from_schema
+from replay_analyzer.extractors.frames import extract_frames_from_schema, drop_repeated_frames
+
+
+logger = logging.getLogger(__name__)
 
 
 # Stockage des tâches en arrière-plan
 background_tasks = {}
 
+# Durée de conservation de l'état d'une tâche terminée (secondes)
+TASK_STATUS_TTL = 3600
+# Nombre maximal d'états conservés, même avant expiration
+TASK_STATUS_MAX_ENTRIES = 1024
+# Échéances d'expiration par replay, dans l'ordre croissant (TTL constant)
+_task_status_expiry: Dict[str, float] = {}
+
+# Répertoire des données produites et durée de validité de son listing (secondes)
+DATA_DIR = "data"
+DATA_DIR_LISTING_TTL = 0.2
+# Dernier listing du répertoire de données : (instant du listing, noms des fichiers)
+_data_dir_listing: Tuple[float, FrozenSet[str]] = (float("-inf"), frozenset())
+
+
+@lru_cache(maxsize=1024)
+def replay_frames_path(replay_id: str) -> str:
+    """Chemin des frames binaires d'un replay, calculé une fois par replay."""
+    return f"{DATA_DIR}/{replay_id}_frames.bin"
+
 
 async def process_frames_background(replay_id: str, file_path: str, raw_data: Dict[str, Any], 
                                    player_actor_map: Dict[str, int], player_ids: list, 
@@ -20,85 +44,140 @@ async def process_frames_background(replay_id: str, file_path: str, raw_data: Di
     """
     try:
         # Mettre à jour l'état
-        background_tasks[replay_id] = {"status": "processing", "progress": 10, "message": "Extraction des frames..."}
+        set_task_status(replay_id, {"status": "processing", "progress": 10, "message": "Extraction des frames..."})
         
         # Extraire les frames en utilisant les méthodes appropriées sans génération synthétique
         try:
-            frames, car_player_map = extract_frames_from_schema(raw_data, player_actor_map, fps, player_ids, players_data)
+            # Extraction CPU-bound : exécutée hors de la boucle d'événements
+            loop = asyncio.get_running_loop()
+            frames, car_player_map = await loop.run_in_executor(
+                None, extract_frames_from_schema, raw_data, player_actor_map, fps, player_ids, players_data
+            )
             
             if not frames:
-                background_tasks[replay_id] = {
+                set_task_status(replay_id, {
                     "status": "failed", 
                     "error": "Aucune frame n'a pu être extraite", 
                     "progress": 0
-                }
+                })
                 return
             
             # Mettre à jour l'état
-            background_tasks[replay_id] = {
+            set_task_status(replay_id, {
                 "status": "processing", 
                 "progress": 50, 
                 "message": f"Écriture de {len(frames)} frames en binaire..."
-            }
+            })
             
-            # Écrire les frames au format binaire
-            frames_bin_path = f"data/{replay_id}_frames.bin"
+            # Écrire les frames au format binaire, directement depuis les tableaux
+            frames_bin_path = replay_frames_path(replay_id)
             writer = BinaryFramesWriter()
-            writer.write_frames_to_binary(frames, frames_bin_path)
+            # Les frames identiques à la précédente (pauses, engagements) ne sont pas écrites
+            arrays = await loop.run_in_executor(None, drop_repeated_frames, frames.to_arrays())
+            logger.info("%d frames identiques ignorées", len(frames) - len(arrays["times"]))
+            await writer.write_frame_arrays(arrays, frames_bin_path)
             
             # Mettre à jour l'état
-            background_tasks[replay_id] = {"status": "completed", "progress": 100}
-            print(f"[INFO] Traitement des frames terminé pour {replay_id}")
+            set_task_status(replay_id, {"status": "completed", "progress": 100})
+            logger.info("Traitement des frames terminé pour %s", replay_id)
         
         except Exception as e:
-            print(f"[ERROR] Erreur lors de l'extraction des frames: {e}")
-            traceback.print_exc()
-            background_tasks[replay_id] = {
+            logger.exception("Erreur lors de l'extraction des frames: %s", e)
+            set_task_status(replay_id, {
                 "status": "failed", 
                 "error": str(e), 
                 "progress": 0
-            }
+            })
         
         # Nettoyer le dictionnaire après un certain temps pour éviter qu'il grossisse indéfiniment
-        asyncio.create_task(cleanup_task_status(replay_id))
+        schedule_task_status_expiry(replay_id)
     
     except Exception as e:
-        print(f"[ERROR] Background processing failed for {replay_id}: {e}")
-        traceback.print_exc()
-        background_tasks[replay_id] = {"status": "failed", "error": str(e), "progress": 0}
-        asyncio.create_task(cleanup_task_status(replay_id))
+        logger.exception("Background processing failed for %s: %s", replay_id, e)
+        fail_task(replay_id, str(e))
 
 
-async def cleanup_task_status(replay_id: str, delay: int = 3600):
+def fail_task(replay_id: str, error: str) -> None:
     """
-    Nettoie les entrées du dictionnaire de tâches après un certain délai.
+    Marque une tâche en échec et programme l'expiration de son état.
     """
-    try:
-        await asyncio.sleep(delay)  # Attendre 1 heure par défaut
-        if replay_id in background_tasks:
-            del background_tasks[replay_id]
-            print(f"[INFO] Cleaned up task status for {replay_id}")
-    except Exception as e:
-        print(f"[WARNING] Failed to clean up task status for {replay_id}: {e}")
+    set_task_status(replay_id, {"status": "failed", "error": error, "progress": 0})
+    schedule_task_status_expiry(replay_id)
+
+
+def set_task_status(replay_id: str, status: Dict[str, Any]) -> None:
+    """
+    Enregistre l'état d'une tâche en bornant la taille du dictionnaire.
+    
+    Les entrées sont réinsérées en fin de dictionnaire à chaque mise à jour :
+    au-delà de TASK_STATUS_MAX_ENTRIES, les moins récemment mises à jour sont supprimées.
+    """
+    background_tasks.pop(replay_id, None)
+    background_tasks[replay_id] = status
+    while len(background_tasks) > TASK_STATUS_MAX_ENTRIES:
+        oldest_id = next(iter(background_tasks))
+        del background_tasks[oldest_id]
+        _task_status_expiry.pop(oldest_id, None)
+
+
+def schedule_task_status_expiry(replay_id: str, delay: float = TASK_STATUS_TTL) -> None:
+    """
+    Programme la suppression de l'état d'une tâche après un certain délai.
+    
+    Pas de tâche asyncio en attente : les entrées expirées sont purgées
+    à chaque consultation ou nouvelle programmation.
+    """
+    # Réinsérer en fin de dictionnaire pour garder les échéances triées
+    _task_status_expiry.pop(replay_id, None)
+    _task_status_expiry[replay_id] = time.monotonic() + delay
+    purge_expired_task_statuses()
+
+
+def purge_expired_task_statuses() -> None:
+    """
+    Supprime les états de tâches dont l'échéance est dépassée.
+    """
+    now = time.monotonic()
+    while _task_status_expiry:
+        replay_id, deadline = next(iter(_task_status_expiry.items()))
+        if deadline > now:
+            break
+        del _task_status_expiry[replay_id]
+        if background_tasks.pop(replay_id, None) is not None:
+            logger.info("Cleaned up task status for %s", replay_id)
+
+
+def _data_dir_entries() -> FrozenSet[str]:
+    """
+    Noms des fichiers du répertoire de données, via un seul os.scandir
+    partagé par toutes les consultations pendant DATA_DIR_LISTING_TTL.
+    """
+    global _data_dir_listing
+    now = time.monotonic()
+    listed_at, entries = _data_dir_listing
+    if now - listed_at > DATA_DIR_LISTING_TTL:
+        try:
+            with os.scandir(DATA_DIR) as it:
+                entries = frozenset(entry.name for entry in it)
+        except FileNotFoundError:
+            entries = frozenset()
+        _data_dir_listing = (now, entries)
+    return entries
 
 
 def get_task_status(replay_id: str) -> Dict[str, Any]:
     """
     Récupère l'état actuel d'une tâche d'arrière-plan.
     """
+    purge_expired_task_statuses()
+    
     # Vérifier si le traitement est en cours
     if replay_id in background_tasks:
         return background_tasks[replay_id]
     
     # Vérifier si le fichier de frames existe (traitement terminé)
-    frames_bin_path = f"data/{replay_id}_frames.bin"
-    if os.path.exists(frames_bin_path):
+    if os.path.basename(replay_frames_path(replay_id)) in _data_dir_entries():
         return {"status": "completed", "progress": 100}
     
-    # Vérifier si au moins les métadonnées existent
-    metadata_path = f"data/{replay_id}_meta.json"
-    if os.path.exists(metadata_path):
-        return {"status": "metadata_only", "progress": 50, "message": "Métadonnées disponibles, frames en attente de traitement"}
-    
     # Aucune donnée trouvée pour ce replay
     return {"status": "unknown", "progress": 0, "message": "Aucune tâche trouvée pour ce replay"} 
\ No newline at end of file
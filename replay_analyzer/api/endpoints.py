@@ -1,12 +1,28 @@
 import os
 import json
+import logging
+import mmap
+import multiprocessing
 import time
 import shutil
 import asyncio
 import uuid
-from typing import Dict, List, Optional, Any, Union
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from operator import itemgetter
+from typing import Dict, List, Optional, Any, Tuple, Union
 from pathlib import Path
 
+import numpy as np
+try:
+    # orjson parse les gros JSON de rrrocket bien plus vite que le module standard
+    import orjson
+    
+    def _json_loads(buf: Any) -> Any:
+        return orjson.loads(memoryview(buf))
+except ImportError:
+    def _json_loads(buf: Any) -> Any:
+        return json.loads(bytes(buf))
 from fastapi import FastAPI, File, UploadFile, HTTPException, BackgroundTasks, Response
 from fastapi.responses import FileResponse, RedirectResponse, JSONResponse
 from pydantic import BaseModel, Field
@@ -14,11 +30,24 @@ from pydantic import BaseModel, Field
 from replay_analyzer.utils.helpers import (
     create_directory_if_not_exists,
     run_command,
+    normalize_player_id,
+    player_stats_ids,
     get_background_task_status,
     set_background_task_status,
     BinaryFramesWriter,
     BinaryFramesReader
 )
+from replay_analyzer.api.background import (
+    process_frames_background,
+    get_task_status,
+    set_task_status,
+    fail_task,
+    replay_frames_path
+)
+from replay_analyzer.extractors.metadata import process_replay_metadata
+
+
+logger = logging.getLogger(__name__)
 
 
 # Modèles de données
@@ -110,13 +139,236 @@ class ReplayDataProcessed(BaseModel):
 UPLOAD_DIR = "uploads"
 DATA_DIR = "data"
 RRROCKET_PATH = "rrrocket"  # Chemin vers l'exécutable rrrocket
+_TIME_KEY = itemgetter("time")  # Clé de tri des événements de la timeline
+UPLOAD_CHUNK_SIZE = 1 << 20  # Taille des blocs copiés lors de l'upload (1 Mio)
+
+# Pool de processus pour l'analyse des métadonnées (créé à la demande)
+_PROCESS_POOL: Optional[ProcessPoolExecutor] = None
+# Nombre de processus du pool, borné pour ne pas monopoliser la machine
+PROCESS_POOL_MAX_WORKERS = min(4, os.cpu_count() or 1)
+
+# Métadonnées déjà analysées, par (replay_id, mtime du fichier replay)
+METADATA_CACHE_SIZE = 128
+_METADATA_CACHE: Dict[Tuple[str, int], Dict] = {}
 
 
 # Fonctions d'analyse et de traitement
+def _load_json_file(json_path: str) -> Any:
+    """Charge un fichier JSON via mmap : décodé depuis le cache de pages, sans copie."""
+    with open(json_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+        return _json_loads(buf)
+
+
+def _build_replay_metadata(json_path: str, replay_id: str, replay_file: str) -> Dict:
+    """
+    Charge la sortie JSON de rrrocket et construit le dictionnaire de métadonnées.
+    
+    Partie purement CPU de analyze_replay_metadata, exécutée dans un processus
+    séparé pour ne pas bloquer la boucle d'événements.
+    """
+    # Charger les données JSON
+    logger.debug("Chargement du JSON depuis %s", json_path)
+    try:
+        data = _load_json_file(json_path)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("JSON chargé: %s octets", os.path.getsize(json_path))
+    except Exception as json_err:
+        logger.error("Erreur lors du chargement JSON: %s", json_err)
+        raise ValueError(f"Erreur de lecture du JSON de sortie: {str(json_err)}")
+    
+    # Traiter les métadonnées
+    logger.debug("Traitement des métadonnées pour %s", replay_id)
+    
+    # Extraire les propriétés du replay
+    properties = data.get("properties", {})
+    
+    # Scores des équipes
+    team0_score = properties.get("Team0Score", 0)
+    team1_score = properties.get("Team1Score", 0)
+    
+    # Préparer les métadonnées
+    metadata = {
+        "id": replay_id,
+        "filename": os.path.basename(replay_file),
+        "name": data.get("game_type", ""),
+        "map_name": properties.get("MapName", ""),
+        "match_type": properties.get("MatchType", ""),
+        "team_size": properties.get("TeamSize", 0),
+        "duration": properties.get("TotalSecondsPlayed", 0.0),
+        "date": properties.get("Date", ""),
+        "version": properties.get("BuildVersion", ""),
+        "team0_score": team0_score,
+        "team1_score": team1_score,
+        "players": [],
+        "teams": {"0": [], "1": []},
+        "timeline": [],
+        "score": {
+            "blue": team0_score,
+            "orange": team1_score,
+            "winner": "blue" if team0_score > team1_score else "orange"
+        }
+    }
+    
+    # Traiter les joueurs
+    player_stats = properties.get("PlayerStats", [])
+    # Correspondance nom -> ID de joueur, pour retrouver l'auteur de chaque but
+    player_id_by_name: Dict[str, str] = {}
+    teams_by_id: Dict[str, List[str]] = metadata["teams"]
+    add_player = metadata["players"].append
+    for player_data in player_stats:
+        if not isinstance(player_data, dict):
+            continue
+        g = player_data.get  # Référence locale, appelée pour chaque champ
+            
+        # Identifiants du joueur, puis ID normalisé (Epic > Steam > nom)
+        epic_id, steam_id = player_stats_ids(player_data)
+        player_id = normalize_player_id({"epic_id": epic_id, "steam_id": steam_id, "name": g("Name", "Unknown")})
+        
+        # Afficher les informations de debug pour ce joueur
+        logger.debug("Joueur: %s - ID généré: %s (Epic ID: %s, Steam ID: %s)", g('Name'), player_id, epic_id, steam_id)
+        
+        player = {
+            "id": player_id,
+            "name": g("Name", "Unknown"),
+            "score": g("Score", 0),
+            "goals": g("Goals", 0),
+            "assists": g("Assists", 0),
+            "saves": g("Saves", 0),
+            "shots": g("Shots", 0),
+            "team": g("Team", 0)
+        }
+        
+        add_player(player)
+        # Le premier joueur portant ce nom l'emporte, comme lors d'un parcours de la liste
+        player_id_by_name.setdefault(player["name"], player_id)
+        
+        # Ajouter le joueur à son équipe (clé normalisée une seule fois par joueur)
+        teams_by_id.setdefault(str(player["team"]), []).append(player_id)
+    
+    # Créer la timeline des événements
+    goals = [goal for goal in properties.get("Goals", []) if type(goal) is dict]
+    
+    # Convertir les numéros de frame de tous les buts en temps en une seule opération
+    record_fps = properties.get("RecordFPS", 30)
+    inv_fps = 1.0 / record_fps if record_fps > 0 else 0.0
+    goal_frames = np.fromiter((goal.get("frame", 0) for goal in goals), dtype=np.float64, count=len(goals))
+    goal_times = (goal_frames * inv_fps).tolist()
+    
+    # Garder une trace du temps du dernier but
+    max_goal_time = max(goal_times, default=0.0)
+    
+    # Construire tous les événements de but en une seule passe
+    goal_events = []
+    add_goal_event = goal_events.append
+    for goal, goal_time in zip(goals, goal_times):
+        goal_player_name = goal.get("PlayerName")
+        shown_name = goal_player_name if "PlayerName" in goal else "Unknown"
+        add_goal_event({
+            "type": "goal",
+            "time": goal_time,
+            # Trouver l'ID du joueur à partir de son nom
+            "player_id": player_id_by_name.get(goal_player_name),
+            "description": f"But de {shown_name}",
+            "details": {
+                "player_name": shown_name,
+                "team": goal.get("PlayerTeam", 0)
+            }
+        })
+    
+    # Ajouter des événements par défaut si la timeline est vide
+    if not goal_events:
+        metadata["timeline"] = [
+            {"type": "match_start", "time": 0.0},
+            {"type": "match_end", "time": properties.get("TotalSecondsPlayed", 300.0)}
+        ]
+    else:
+        # Calculer le temps de fin réel (soit la durée officielle, soit le dernier but + 25 secondes, selon ce qui est le plus grand)
+        match_end_time = max(properties.get("TotalSecondsPlayed", 300.0), max_goal_time + 25.0)
+        
+        # Encadrer les buts par le début et la fin du match
+        metadata["timeline"] = [
+            {"type": "match_start", "time": 0.0},
+            *goal_events,
+            {"type": "match_end", "time": match_end_time}
+        ]
+        
+        # Trier la timeline par temps croissant pour garantir l'ordre chronologique
+        metadata["timeline"].sort(key=_TIME_KEY)
+    
+    return metadata
+
+
+@lru_cache(maxsize=1024)
+def _replay_file_path(replay_id: str) -> str:
+    """Chemin du fichier replay uploadé (calculé une fois par replay)."""
+    return os.path.join(UPLOAD_DIR, f"{replay_id}.replay")
+
+
+def _metadata_response(metadata: Dict) -> ReplayDataProcessed:
+    """
+    Construit la réponse à partir des métadonnées de _build_replay_metadata.
+    
+    Ces données sont produites par le serveur lui-même : construct() évite de les
+    revalider champ par champ, les sous-modèles sont construits de la même façon.
+    """
+    return ReplayDataProcessed.construct(**{
+        **metadata,
+        "players": [PlayerStats.construct(**player) for player in metadata.get("players", [])],
+        "timeline": [TimelineEvent.construct(**event) for event in metadata.get("timeline", [])]
+    })
+
+
+def _copy_metadata(metadata: Dict) -> Dict:
+    """
+    Copie des métadonnées jusqu'aux dicts de joueurs, d'équipes et d'événements,
+    pour qu'un appelant ne puisse pas modifier l'entrée partagée du cache.
+    """
+    return {
+        **metadata,
+        "players": [dict(player) for player in metadata.get("players", [])],
+        "teams": {team: list(ids) for team, ids in metadata.get("teams", {}).items()},
+        "timeline": [dict(event) for event in metadata.get("timeline", [])],
+        "score": dict(metadata.get("score", {}))
+    }
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    """Retourne le pool de processus partagé, créé au premier appel."""
+    global _PROCESS_POOL
+    if _PROCESS_POOL is None:
+        # "spawn" : les processus ne sont pas forkés depuis le serveur, dont les threads
+        # (exécuteur par défaut) peuvent détenir des verrous au moment du fork
+        _PROCESS_POOL = ProcessPoolExecutor(
+            max_workers=PROCESS_POOL_MAX_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _PROCESS_POOL
+
+
+def shutdown_process_pool() -> None:
+    """Arrête le pool de processus s'il a été créé (à l'arrêt de l'application)."""
+    global _PROCESS_POOL
+    if _PROCESS_POOL is not None:
+        _PROCESS_POOL.shutdown(wait=True)
+        _PROCESS_POOL = None
+
+
 async def analyze_replay_metadata(replay_file: str, replay_id: str) -> Dict:
     """Analyse les métadonnées d'un fichier replay en utilisant rrrocket"""
+    # Métadonnées déjà calculées pour cette version du fichier replay
     try:
-        print(f"[DEBUG] analyze_replay_metadata: début pour {replay_id}")
+        cache_key = (replay_id, os.stat(replay_file).st_mtime_ns)
+    except OSError:
+        cache_key = None
+    cached = _METADATA_CACHE.pop(cache_key, None) if cache_key is not None else None
+    if cached is not None:
+        # Réinsérée en fin de dict : l'entrée devient la plus récemment utilisée
+        _METADATA_CACHE[cache_key] = cached
+        logger.debug("analyze_replay_metadata: métadonnées en cache pour %s", replay_id)
+        return _copy_metadata(cached)
+    
+    try:
+        logger.debug("analyze_replay_metadata: début pour %s", replay_id)
         
         # Créer le répertoire DATA_DIR s'il n'existe pas temporairement
         create_directory_if_not_exists(DATA_DIR)
@@ -125,222 +377,57 @@ async def analyze_replay_metadata(replay_file: str, replay_id: str) -> Dict:
         request_uuid = str(uuid.uuid4())
         temp_output_json = f"{DATA_DIR}/{replay_id}_{request_uuid}_temp_output.json"
         
-        print(f"[DEBUG] Utilisation du fichier temporaire: {temp_output_json}")
+        logger.debug("Utilisation du fichier temporaire: %s", temp_output_json)
         
         # Exécuter rrrocket pour analyser le replay
-        print(f"[DEBUG] Exécution de rrrocket pour {replay_id}: {RRROCKET_PATH} --pretty {replay_file}")
+        logger.debug("Exécution de rrrocket pour %s: %s --pretty %s", replay_id, RRROCKET_PATH, replay_file)
         result = await run_command([
             RRROCKET_PATH, "--pretty", replay_file
         ], output_file=temp_output_json)
         
-        print(f"[DEBUG] rrrocket terminé avec code: {result[0]}")
+        logger.debug("rrrocket terminé avec code: %s", result[0])
         
         # Vérifier si la commande a réussi
         if result[0] != 0:
             error_msg = result[2]
-            print(f"[ERROR] rrrocket a échoué: {error_msg}")
+            logger.error("rrrocket a échoué: %s", error_msg)
             raise HTTPException(status_code=500, 
                                 detail=f"Erreur d'analyse du replay: {error_msg}")
         
-        # Charger les données JSON
-        print(f"[DEBUG] Chargement du JSON depuis {temp_output_json}")
-        try:
-            with open(temp_output_json, "r") as f:
-                data = json.load(f)
-            print(f"[DEBUG] JSON chargé: {len(str(data))} caractères")
-        except Exception as json_err:
-            print(f"[ERROR] Erreur lors du chargement JSON: {str(json_err)}")
-            raise HTTPException(status_code=500, detail=f"Erreur de lecture du JSON de sortie: {str(json_err)}")
-        
-        # Traiter les métadonnées
-        print(f"[DEBUG] Traitement des métadonnées pour {replay_id}")
-        
-        # Extraire les propriétés du replay
-        properties = data.get("properties", {})
-        
-        # Préparer les métadonnées
-        metadata = {
-            "id": replay_id,
-            "filename": os.path.basename(replay_file),
-            "name": data.get("game_type", ""),
-            "map_name": properties.get("MapName", ""),
-            "match_type": properties.get("MatchType", ""),
-            "team_size": properties.get("TeamSize", 0),
-            "duration": properties.get("TotalSecondsPlayed", 0.0),
-            "date": properties.get("Date", ""),
-            "version": properties.get("BuildVersion", ""),
-            "team0_score": properties.get("Team0Score", 0),
-            "team1_score": properties.get("Team1Score", 0),
-            "players": [],
-            "teams": {"0": [], "1": []},
-            "timeline": [],
-            "score": {
-                "blue": properties.get("Team0Score", 0),
-                "orange": properties.get("Team1Score", 0),
-                "winner": "blue" if properties.get("Team0Score", 0) > properties.get("Team1Score", 0) else "orange"
-            }
-        }
-        
-        # Traiter les joueurs
-        player_stats = properties.get("PlayerStats", [])
-        for player_data in player_stats:
-            if not isinstance(player_data, dict):
-                continue
-                
-            # Extraire les identifiants du joueur
-            player_id_data = player_data.get("PlayerID", {}).get("fields", {})
-            epic_id = player_id_data.get("EpicAccountId", "")
-            
-            # Récupérer l'ID Steam
-            steam_id = None
-            
-            # 1. Vérifier le OnlineID (plus courant pour Steam)
-            online_id = player_data.get("OnlineID", "")
-            if online_id and online_id != "0" and online_id != "":
-                # Vérifier si c'est une plateforme Steam
-                platform_type = ""
-                if isinstance(player_data.get("Platform"), dict):
-                    platform_type = player_data["Platform"].get("value", "").lower()
-                
-                if "steam" in platform_type or not platform_type:
-                    steam_id = online_id
-                    print(f"[DEBUG] Steam ID trouvé dans OnlineID: {steam_id}")
-            
-            # 2. Vérifier dans les ID de plateforme si OnlineID n'a pas donné de résultat
-            if not steam_id:
-                platform_obj = player_id_data.get("Platform", {})
-                platform_value = platform_obj.get("value", "") if isinstance(platform_obj, dict) else ""
-                
-                # 3. Vérifier dans les ID distants (remote_id)
-                if "NpId" in player_id_data and isinstance(player_id_data["NpId"], dict):
-                    np_fields = player_id_data["NpId"].get("fields", {})
-                    if "Handle" in np_fields and isinstance(np_fields["Handle"], dict):
-                        handle_fields = np_fields["Handle"].get("fields", {})
-                        steam_handle = handle_fields.get("Data", "")
-                        if steam_handle and steam_handle != "0":
-                            steam_id = steam_handle
-                
-                # 4. Vérifier s'il existe des propriétés UniqueId ou remote_id avec Steam
-                for prop_name, prop_value in player_id_data.items():
-                    if isinstance(prop_value, dict) and "remote_id" in prop_value:
-                        remote_id = prop_value.get("remote_id", {})
-                        if isinstance(remote_id, dict) and "Steam" in remote_id:
-                            steam_value = remote_id.get("Steam")
-                            if steam_value and steam_value != "0":
-                                steam_id = steam_value
-            
-            # Détermine l'ID du joueur en utilisant la hiérarchie de priorité
-            player_id = None
-            if epic_id and epic_id != "":
-                player_id = f"epic_{epic_id}"
-            elif steam_id and steam_id != "":
-                player_id = f"steam_{steam_id}"
-            else:
-                player_id = f"name_{player_data.get('Name', 'Unknown')}"
-            
-            # S'assurer que platform_value est définie
-            platform_value = ""
-            if isinstance(player_id_data.get("Platform"), dict):
-                platform_value = player_id_data["Platform"].get("value", "")
-            
-            # Afficher les informations de debug pour ce joueur
-            print(f"[DEBUG] Joueur: {player_data.get('Name')} - ID généré: {player_id}")
-            print(f"[DEBUG] Epic ID: {epic_id}, Steam ID: {steam_id}, Platform: {platform_value}")
-            
-            player = {
-                "id": player_id,
-                "name": player_data.get("Name", "Unknown"),
-                "score": player_data.get("Score", 0),
-                "goals": player_data.get("Goals", 0),
-                "assists": player_data.get("Assists", 0),
-                "saves": player_data.get("Saves", 0),
-                "shots": player_data.get("Shots", 0),
-                "team": player_data.get("Team", 0)
-            }
-            
-            metadata["players"].append(player)
-            
-            # Ajouter le joueur à son équipe
-            team_key = str(player["team"])
-            if team_key not in metadata["teams"]:
-                metadata["teams"][team_key] = []
-            metadata["teams"][team_key].append(player["id"])
-        
-        # Créer la timeline des événements
-        goals = properties.get("Goals", [])
-        max_goal_time = 0.0
-        
-        for goal in goals:
-            if not isinstance(goal, dict):
-                continue
-                
-            time_fraction = goal.get("frame", 0) / (properties.get("RecordFPS", 30) * properties.get("TotalSecondsPlayed", 300))
-            time = time_fraction * properties.get("TotalSecondsPlayed", 300)
-            
-            # Garder une trace du temps du dernier but
-            if time > max_goal_time:
-                max_goal_time = time
-            
-            event = {
-                "type": "goal",
-                "time": time,
-                "player_id": None,  # Sera rempli ci-dessous
-                "description": f"But de {goal.get('PlayerName', 'Unknown')}",
-                "details": {
-                    "player_name": goal.get("PlayerName", "Unknown"),
-                    "team": goal.get("PlayerTeam", 0)
-                }
-            }
-            
-            # Trouver l'ID du joueur à partir de son nom
-            for player in metadata["players"]:
-                if player["name"] == goal.get("PlayerName"):
-                    event["player_id"] = player["id"]
-                    break
-            
-            metadata["timeline"].append(event)
+        # Charger le JSON et construire les métadonnées dans le pool de processus
+        loop = asyncio.get_running_loop()
+        metadata = await loop.run_in_executor(
+            _get_process_pool(), _build_replay_metadata, temp_output_json, replay_id, replay_file
+        )
         
-        # Ajouter des événements par défaut si la timeline est vide
-        if not metadata["timeline"]:
-            metadata["timeline"] = [
-                {"type": "match_start", "time": 0.0},
-                {"type": "match_end", "time": properties.get("TotalSecondsPlayed", 300.0)}
-            ]
-        else:
-            # Calculer le temps de fin réel (soit la durée officielle, soit le dernier but + 25 secondes, selon ce qui est le plus grand)
-            match_end_time = max(properties.get("TotalSecondsPlayed", 300.0), max_goal_time + 25.0)
-            
-            # Ajouter le début et la fin du match
-            metadata["timeline"].insert(0, {"type": "match_start", "time": 0.0})
-            metadata["timeline"].append({"type": "match_end", "time": match_end_time})
-            
-            # Trier la timeline par temps croissant pour garantir l'ordre chronologique
-            metadata["timeline"] = sorted(metadata["timeline"], key=lambda x: x["time"])
+        # Supprimer le fichier temporaire après utilisation (un seul appel système)
+        try:
+            os.remove(temp_output_json)
+            logger.debug("Fichier temporaire supprimé: %s", temp_output_json)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning("Impossible de supprimer le fichier temporaire: %s", e)
         
-        # Supprimer le fichier temporaire après utilisation
-        if os.path.exists(temp_output_json):
-            try:
-                os.remove(temp_output_json)
-                print(f"[DEBUG] Fichier temporaire supprimé: {temp_output_json}")
-            except Exception as e:
-                print(f"[WARNING] Impossible de supprimer le fichier temporaire: {str(e)}")
+        if cache_key is not None:
+            _METADATA_CACHE[cache_key] = metadata
+            # Éviction des entrées les moins récemment utilisées (tête du dict)
+            while len(_METADATA_CACHE) > METADATA_CACHE_SIZE:
+                del _METADATA_CACHE[next(iter(_METADATA_CACHE))]
         
-        print(f"[DEBUG] analyze_replay_metadata: terminé pour {replay_id}")
-        return metadata
+        logger.debug("analyze_replay_metadata: terminé pour %s", replay_id)
+        return _copy_metadata(metadata)
         
     except Exception as e:
         # En cas d'erreur, mettre à jour le statut et lever une exception
-        print(f"[ERROR] Exception dans analyze_replay_metadata: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Exception dans analyze_replay_metadata: %s", e)
         set_background_task_status(replay_id, {"status": "error", "error": str(e), "progress": 0})
         
         # Nettoyer les fichiers temporaires en cas d'erreur
-        if os.path.exists(temp_output_json):
-            try:
-                os.remove(temp_output_json)
-            except:
-                pass
+        try:
+            os.remove(temp_output_json)
+        except:
+            pass
                 
         raise HTTPException(status_code=500, detail=f"Erreur d'analyse des métadonnées: {str(e)}")
 
@@ -348,7 +435,7 @@ async def analyze_replay_metadata(replay_file: str, replay_id: str) -> Dict:
 async def generate_replay_raw_json(replay_file: str, replay_id: str, network_parse: bool = False) -> str:
     """Génère le fichier JSON à partir du replay et retourne le chemin du fichier temporaire"""
     try:
-        print(f"[DEBUG] generate_replay_raw_json: début pour {replay_id}")
+        logger.debug("generate_replay_raw_json: début pour %s", replay_id)
         
         # Créer le répertoire DATA_DIR s'il n'existe pas
         create_directory_if_not_exists(DATA_DIR)
@@ -357,7 +444,7 @@ async def generate_replay_raw_json(replay_file: str, replay_id: str, network_par
         request_uuid = str(uuid.uuid4())
         temp_output_json = f"{DATA_DIR}/{replay_id}_{request_uuid}_temp_output.json"
         
-        print(f"[DEBUG] Utilisation du fichier temporaire: {temp_output_json}")
+        logger.debug("Utilisation du fichier temporaire: %s", temp_output_json)
         
         # Préparer la commande rrrocket
         command = [RRROCKET_PATH, "--pretty"]
@@ -366,31 +453,81 @@ async def generate_replay_raw_json(replay_file: str, replay_id: str, network_par
         command.append(replay_file)
         
         # Exécuter rrrocket
-        print(f"[DEBUG] Exécution de rrrocket: {' '.join(command)}")
+        logger.debug("Exécution de rrrocket: %s", ' '.join(command))
         result = await run_command(command, output_file=temp_output_json)
         
-        print(f"[DEBUG] rrrocket terminé avec code: {result[0]}")
+        logger.debug("rrrocket terminé avec code: %s", result[0])
         
         # Vérifier si la commande a réussi
         if result[0] != 0:
             error_msg = result[2]
-            print(f"[ERROR] rrrocket a échoué: {error_msg}")
+            logger.error("rrrocket a échoué: %s", error_msg)
             raise HTTPException(status_code=500, 
                                 detail=f"Erreur d'analyse du replay: {error_msg}")
         
         return temp_output_json
         
     except Exception as e:
-        print(f"[ERROR] Exception dans generate_replay_raw_json: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Exception dans generate_replay_raw_json: %s", e)
         raise HTTPException(status_code=500, detail=f"Erreur de génération du JSON: {str(e)}")
 
 
+def _frames_job_inputs(json_path: str, replay_id: str) -> Tuple[Dict[str, Any], Dict[int, str], List[str], Dict[str, Any], float]:
+    """
+    Charge la sortie réseau de rrrocket et prépare les arguments de process_frames_background :
+    données brutes, correspondance acteur -> joueur, IDs et données des joueurs, FPS d'enregistrement.
+    
+    Les joueurs proviennent de process_replay_metadata, avec les mêmes IDs que les métadonnées.
+    """
+    raw_data = _load_json_file(json_path)
+    processed = process_replay_metadata(replay_id, raw_data)
+    
+    players_data = {player_id: player.dict() for player_id, player in processed.players.items()}
+    actor_player_map = {
+        player.actor_id: player_id
+        for player_id, player in processed.players.items()
+        if player.actor_id is not None
+    }
+    properties = raw_data.get("properties")
+    fps = float((properties.get("RecordFPS") if type(properties) is dict else None) or 30.0)
+    
+    return raw_data, actor_player_map, list(players_data), players_data, fps
+
+
+async def process_replay_frames(replay_file: str, replay_id: str) -> None:
+    """
+    Tâche d'arrière-plan lancée après l'upload : génère la sortie réseau de rrrocket,
+    puis écrit les frames binaires servies par /replays/{replay_id}/frames.bin.
+    """
+    set_task_status(replay_id, {"status": "processing", "progress": 0, "message": "Analyse réseau du replay..."})
+    
+    temp_json_file = None
+    try:
+        temp_json_file = await generate_replay_raw_json(replay_file, replay_id, network_parse=True)
+        loop = asyncio.get_running_loop()
+        job_inputs = await loop.run_in_executor(None, _frames_job_inputs, temp_json_file, replay_id)
+    except Exception as e:
+        logger.exception("Préparation des frames impossible pour %s: %s", replay_id, e)
+        fail_task(replay_id, e.detail if isinstance(e, HTTPException) else str(e))
+        return
+    finally:
+        # Le JSON réseau n'est plus utile une fois chargé
+        if temp_json_file is not None:
+            try:
+                os.remove(temp_json_file)
+            except FileNotFoundError:
+                pass
+    
+    await process_frames_background(replay_id, replay_file, *job_inputs)
+
+
 # Configuration des routes
 def setup_routes(app: FastAPI) -> None:
     """Configure les routes pour l'application FastAPI"""
     
+    # Libérer les processus d'analyse à l'arrêt du serveur
+    app.add_event_handler("shutdown", shutdown_process_pool)
+    
     @app.get("/")
     async def root():
         """Redirection vers l'interface React"""
@@ -398,75 +535,81 @@ def setup_routes(app: FastAPI) -> None:
     
     @app.post("/replays")
     async def upload_replay(
+        background_tasks: BackgroundTasks,
         file: UploadFile = File(...)
     ):
         """Upload et analyse d'un fichier replay"""
         try:
-            print(f"[DEBUG] Début upload_replay: fichier={file.filename}")
+            logger.debug("Début upload_replay: fichier=%s", file.filename)
             # Vérifier l'extension du fichier
             if not file.filename.endswith('.replay'):
-                print(f"[ERROR] Extension de fichier invalide: {file.filename}")
+                logger.error("Extension de fichier invalide: %s", file.filename)
                 raise HTTPException(status_code=400, detail="Le fichier doit être au format .replay")
             
             # Générer un ID unique pour le replay
             replay_id = str(uuid.uuid4())
-            print(f"[DEBUG] ID généré: {replay_id}")
+            logger.debug("ID généré: %s", replay_id)
             
             # Créer les répertoires s'ils n'existent pas
-            print(f"[DEBUG] Création des répertoires: {UPLOAD_DIR}")
+            logger.debug("Création des répertoires: %s", UPLOAD_DIR)
             create_directory_if_not_exists(UPLOAD_DIR)
             
             # Sauvegarder le fichier upload
-            replay_path = os.path.join(UPLOAD_DIR, f"{replay_id}.replay")
-            print(f"[DEBUG] Sauvegarde du fichier vers: {replay_path}")
+            replay_path = _replay_file_path(replay_id)
+            logger.debug("Sauvegarde du fichier vers: %s", replay_path)
+            # Copie par blocs hors de la boucle d'événements, sans charger tout le fichier
+            loop = asyncio.get_running_loop()
             with open(replay_path, "wb") as f:
-                shutil.copyfileobj(file.file, f)
-                print(f"[DEBUG] Fichier sauvegardé")
+                await loop.run_in_executor(None, shutil.copyfileobj, file.file, f, UPLOAD_CHUNK_SIZE)
+                logger.debug("Fichier sauvegardé")
             
             try:
                 # Analyser les métadonnées
-                print(f"[DEBUG] Analyse des métadonnées: {replay_path}")
+                logger.debug("Analyse des métadonnées: %s", replay_path)
                 metadata = await analyze_replay_metadata(replay_path, replay_id)
-                print(f"[DEBUG] Métadonnées récupérées, id={replay_id}")
+                logger.debug("Métadonnées récupérées, id=%s", replay_id)
+                
+                # Les frames binaires sont produites après l'envoi de la réponse
+                background_tasks.add_task(process_replay_frames, replay_path, replay_id)
                 
                 # Retourner les métadonnées immédiates
-                print(f"[DEBUG] Retour des métadonnées pour {replay_id}")
-                return ReplayDataProcessed(**metadata)
+                logger.debug("Retour des métadonnées pour %s", replay_id)
+                return _metadata_response(metadata)
                 
             except Exception as e:
                 # En cas d'erreur, supprimer le fichier et renvoyer l'erreur
-                print(f"[ERROR] Exception pendant le traitement de {replay_id}: {str(e)}")
-                import traceback
-                traceback.print_exc()
+                logger.exception("Exception pendant le traitement de %s: %s", replay_id, e)
                 if os.path.exists(replay_path):
                     os.remove(replay_path)
-                    print(f"[DEBUG] Fichier supprimé suite à l'erreur: {replay_path}")
+                    logger.debug("Fichier supprimé suite à l'erreur: %s", replay_path)
                 
                 raise HTTPException(status_code=500, detail=f"Erreur serveur: {str(e)}")
         except Exception as e:
-            print(f"[ERROR] Exception non gérée dans upload_replay: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Exception non gérée dans upload_replay: %s", e)
             raise HTTPException(status_code=500, detail=f"Erreur serveur: {str(e)}")
     
     @app.get("/replays/{replay_id}")
     async def get_replay_file(replay_id: str):
         """Télécharger le fichier replay original"""
-        replay_file = os.path.join(UPLOAD_DIR, f"{replay_id}.replay")
+        replay_file = _replay_file_path(replay_id)
         
-        if not os.path.exists(replay_file):
+        # Un seul stat : sert au test d'existence et est réutilisé par FileResponse
+        try:
+            replay_stat = os.stat(replay_file)
+        except FileNotFoundError:
             raise HTTPException(status_code=404, detail="Fichier replay non trouvé")
             
         return FileResponse(
             path=replay_file,
             media_type="application/octet-stream", 
-            filename=f"{replay_id}.replay"
+            filename=f"{replay_id}.replay",
+            stat_result=replay_stat
         )
     
     @app.get("/replays/{replay_id}/meta")
     async def get_replay_metadata(replay_id: str):
         """Obtenir les métadonnées d'un replay en générant le JSON à la volée"""
-        replay_file = os.path.join(UPLOAD_DIR, f"{replay_id}.replay")
+        replay_file = _replay_file_path(replay_id)
         
         if not os.path.exists(replay_file):
             raise HTTPException(status_code=404, detail="Fichier replay non trouvé")
@@ -475,48 +618,24 @@ def setup_routes(app: FastAPI) -> None:
             # Analyser les métadonnées (génération à la volée)
             metadata = await analyze_replay_metadata(replay_file, replay_id)
             
-            # S'assurer que chaque joueur a un ID
-            for i, player in enumerate(metadata.get("players", [])):
-                if "id" not in player:
-                    player["id"] = f"player_{i}"
-            
-            # Filtrer les événements inconnus de la timeline
-            if metadata.get("timeline"):
-                metadata["timeline"] = [
-                    event for event in metadata["timeline"]
-                    if event.get("type") != "unknown"
-                ]
-                
-                # Si la timeline est vide, ajouter des événements par défaut
-                if not metadata["timeline"]:
-                    metadata["timeline"] = [
-                        {"type": "match_start", "time": 0.0},
-                        {"type": "match_end", "time": metadata.get("duration", 300.0)}
-                    ]
+            # S'assurer que chaque joueur a un ID (nouveaux dicts, sans modifier les joueurs reçus)
+            metadata["players"] = [
+                player if "id" in player else {**player, "id": f"player_{i}"}
+                for i, player in enumerate(metadata.get("players", []))
+            ]
             
-            # Valider la réponse
-            response_data = {
-                **metadata,
-                "team0_score": metadata.get("team0_score", 0),
-                "team1_score": metadata.get("team1_score", 0),
-                "score": {
-                    "blue": metadata.get("team0_score", 0),
-                    "orange": metadata.get("team1_score", 0),
-                    "winner": "blue" if metadata.get("team0_score", 0) > metadata.get("team1_score", 0) else "orange"
-                }
-            }
-            return ReplayDataProcessed(**response_data)
+            # Pas de filtrage par requête : _build_replay_metadata ne produit que des
+            # événements connus (début, buts, fin) et jamais de timeline vide
+            return _metadata_response(metadata)
             
         except Exception as e:
-            print(f"[ERROR] Exception dans get_replay_metadata: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Exception dans get_replay_metadata: %s", e)
             raise HTTPException(status_code=500, detail=f"Erreur d'analyse du replay: {str(e)}")
     
     @app.get("/replays/{replay_id}/raw")
     async def get_replay_raw_json(replay_id: str, background_tasks: BackgroundTasks):
         """Obtenir le fichier JSON complet généré par rrrocket (avec --network-parse)"""
-        replay_file = os.path.join(UPLOAD_DIR, f"{replay_id}.replay")
+        replay_file = _replay_file_path(replay_id)
         
         if not os.path.exists(replay_file):
             raise HTTPException(status_code=404, detail="Fichier replay non trouvé")
@@ -529,12 +648,13 @@ def setup_routes(app: FastAPI) -> None:
             async def remove_temp_file():
                 # Attendre un petit délai pour s'assurer que le fichier a été envoyé
                 await asyncio.sleep(5)
-                if os.path.exists(temp_json_file):
-                    try:
-                        os.remove(temp_json_file)
-                        print(f"[DEBUG] Fichier temporaire supprimé après envoi: {temp_json_file}")
-                    except Exception as e:
-                        print(f"[WARNING] Impossible de supprimer le fichier temporaire: {str(e)}")
+                try:
+                    os.remove(temp_json_file)
+                    logger.debug("Fichier temporaire supprimé après envoi: %s", temp_json_file)
+                except FileNotFoundError:
+                    pass
+                except Exception as e:
+                    logger.warning("Impossible de supprimer le fichier temporaire: %s", e)
             
             background_tasks.add_task(remove_temp_file)
             
@@ -546,11 +666,31 @@ def setup_routes(app: FastAPI) -> None:
             )
             
         except Exception as e:
-            print(f"[ERROR] Exception dans get_replay_raw_json: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Exception dans get_replay_raw_json: %s", e)
             raise HTTPException(status_code=500, detail=f"Erreur de génération du JSON complet: {str(e)}")
     
+    @app.get("/replays/{replay_id}/frames.bin")
+    async def get_replay_frames_binary(replay_id: str):
+        """Télécharger les frames au format binaire RLFRAME (en-tête magic + version + nombre de frames),
+        sans passer par une désérialisation/sérialisation JSON"""
+        frames_file = replay_frames_path(replay_id)
+        
+        try:
+            frames_stat = os.stat(frames_file)
+        except FileNotFoundError:
+            # Frames pas encore écrites : renvoyer l'état de la tâche d'arrière-plan
+            task_status = get_task_status(replay_id)
+            if task_status["status"] == "processing":
+                return JSONResponse(status_code=202, content=task_status)
+            raise HTTPException(status_code=404, detail=task_status.get("error", "Frames binaires non trouvées"))
+        
+        return FileResponse(
+            path=frames_file,
+            media_type="application/octet-stream",
+            filename=f"{replay_id}_frames.bin",
+            stat_result=frames_stat
+        )
+    
     # Route de compatibilité avec l'ancien endpoint (renvoie vers le nouveau /meta)
     @app.get("/replays/{replay_id}/metadata")
     async def get_replay_metadata_compat(replay_id: str):
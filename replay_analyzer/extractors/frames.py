@@ -1,60 +1,269 @@
-import traceback
+import logging
 from typing import Dict, List, Any, Tuple, Optional
 
-from replay_analyzer.utils.helpers import get_player_team
+import numpy as np
+
+from replay_analyzer.utils.binary import frames_from_arrays
+
+
+logger = logging.getLogger(__name__)
+
+
+# Valeurs par défaut des états de balle et de voiture
+BALL_DEFAULT_POS = (0, 0, 93)
+BALL_DEFAULT_VEL = (0, 0, 0)
+CAR_DEFAULT_POS = (0, 0, 17)
+CAR_DEFAULT_ROT = (0, 0, 0, 1)
+CAR_DEFAULT_BOOST = 33
+
+# Noms possibles de chaque champ selon le format, par ordre de priorité
+POSITION_KEYS = ("position", "loc")
+ROTATION_KEYS = ("rotation", "rot")
+VELOCITY_KEYS = ("velocity", "vel")
+BOOST_KEYS = ("boost", "boost_amount")
+
+
+# Nombre maximal de frames conservées par replay
+MAX_FRAMES = 600
+
+
+def sample_indices(timestamps: np.ndarray, max_frames: int = MAX_FRAMES) -> np.ndarray:
+    """
+    Indices croissants d'au plus `max_frames` timestamps (triés) à conserver.
+    
+    Les timestamps retenus sont les premiers atteignant une grille régulière dans le
+    temps, et non un pas d'index fixe qui favoriserait les passages plus denses.
+    """
+    if len(timestamps) <= max_frames:
+        return np.arange(len(timestamps))
+    targets = np.linspace(timestamps[0], timestamps[-1], max_frames)
+    return np.unique(np.minimum(np.searchsorted(timestamps, targets), len(timestamps) - 1))
+
+
+def sample_timestamps(timestamps: np.ndarray, max_frames: int = MAX_FRAMES) -> np.ndarray:
+    """Sous-échantillonne des timestamps triés et uniques à au plus `max_frames` valeurs."""
+    if len(timestamps) <= max_frames:
+        return timestamps
+    return timestamps[sample_indices(timestamps, max_frames)]
+
+
+def drop_repeated_frames(arrays: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Retire les frames dont l'état (balle et voitures) est identique à celui de la frame précédente.
+    
+    Chaque frame conservée garde son timestamp: le viewer maintient le dernier état
+    jusqu'à la frame suivante. La première et la dernière frame sont toujours conservées.
+    """
+    frame_count = len(arrays["times"])
+    if frame_count < 3:
+        return arrays
+    
+    # Comparer chaque frame à la précédente, champ par champ, en une opération vectorisée
+    changed = np.zeros(frame_count, dtype=bool)
+    changed[0] = changed[-1] = True
+    for key in ("ball_pos", "ball_rot", "ball_vel", "car_present", "car_pos", "car_rot", "car_boost"):
+        values = arrays.get(key)
+        if values is None:
+            # ball_rot est facultatif
+            continue
+        values = np.asarray(values)
+        diff = values[1:] != values[:-1]
+        changed[1:] |= diff.reshape(frame_count - 1, -1).any(axis=1)
+    
+    if changed.all():
+        return arrays
+    
+    kept = dict(arrays)
+    for key, values in arrays.items():
+        if isinstance(values, np.ndarray) and len(values) == frame_count:
+            kept[key] = values[changed]
+    return kept
+
+
+def _vector(value: Optional[List[float]], size: int, default: Tuple) -> Any:
+    """Retourne `value` si c'est un vecteur de `size` composantes, sinon la valeur par défaut."""
+    if isinstance(value, (list, tuple)) and len(value) == size:
+        return value
+    return default
+
+
+def _last_occurrences(flat_index: np.ndarray) -> np.ndarray:
+    """Positions de la dernière occurrence de chaque valeur de `flat_index`."""
+    _, first_in_reversed = np.unique(flat_index[::-1], return_index=True)
+    return len(flat_index) - 1 - first_in_reversed
+
+
+class FrameArrays:
+    """
+    Frames d'un replay stockées en tableaux numpy (SoA) plutôt qu'en dicts par frame.
+    
+    Une ligne par timestamp et un emplacement par joueur, attribué à la première
+    apparition de sa voiture. Les états sont d'abord accumulés en colonnes, puis
+    placés dans les tableaux en une seule affectation vectorisée par champ.
+    to_arrays() retourne la même disposition que BinaryFramesReader.read_frame_arrays;
+    to_frames() reconstruit les dicts.
+    """
+    
+    def __init__(self, times: List[float]):
+        self.times = np.asarray(times, dtype=np.float32)
+        self.car_ids: List[str] = []
+        self.car_slots: Dict[str, int] = {}
+        # États en attente de placement: (ligne, valeurs)
+        self._ball_rows: List[int] = []
+        self._ball_pos: List[Any] = []
+        self._ball_vel: List[Any] = []
+        self._car_rows: List[int] = []
+        self._car_cols: List[int] = []
+        self._car_pos: List[Any] = []
+        self._car_rot: List[Any] = []
+        self._car_boost: List[int] = []
+        self._arrays: Optional[Dict[str, Any]] = None
+    
+    def __len__(self) -> int:
+        return len(self.times)
+    
+    def car_slot(self, player_id: str) -> int:
+        """Retourne l'emplacement du joueur, en l'attribuant à sa première apparition."""
+        slot = self.car_slots.get(player_id)
+        if slot is None:
+            slot = self.car_slots[player_id] = len(self.car_ids)
+            self.car_ids.append(player_id)
+        return slot
+    
+    def set_ball(self, index: int, position: Optional[List[float]], velocity: Optional[List[float]]) -> None:
+        """Remplace l'état de la balle dans une frame (valeurs par défaut si absentes)."""
+        self._ball_rows.append(index)
+        self._ball_pos.append(_vector(position, 3, BALL_DEFAULT_POS))
+        self._ball_vel.append(_vector(velocity, 3, BALL_DEFAULT_VEL))
+        self._arrays = None
+    
+    def set_car(self, index: int, player_id: str, position: Optional[List[float]],
+                rotation: Optional[List[float]], boost: Optional[int]) -> None:
+        """Remplace l'état de la voiture d'un joueur dans une frame."""
+        self._car_rows.append(index)
+        self._car_cols.append(self.car_slot(player_id))
+        self._car_pos.append(_vector(position, 3, CAR_DEFAULT_POS))
+        self._car_rot.append(_vector(rotation, 4, CAR_DEFAULT_ROT))
+        self._car_boost.append(boost if boost is not None else CAR_DEFAULT_BOOST)
+        self._arrays = None
+    
+    def to_arrays(self) -> Dict[str, Any]:
+        """
+        Tableaux SoA, remplis en une affectation par champ.
+        
+        Si une même frame (ou un même couple frame/voiture) reçoit plusieurs états,
+        seul le dernier est conservé: numpy ne garantit pas l'ordre d'une affectation
+        à indices répétés, les doublons sont donc retirés avant.
+        """
+        if self._arrays is not None:
+            return self._arrays
+        
+        frame_count, car_count = len(self.times), len(self.car_ids)
+        ball_pos = np.empty((frame_count, 3), dtype=np.float32)
+        ball_pos[:] = BALL_DEFAULT_POS
+        ball_vel = np.zeros((frame_count, 3), dtype=np.float32)
+        if self._ball_rows:
+            rows = np.asarray(self._ball_rows)
+            keep = _last_occurrences(rows)
+            ball_pos[rows[keep]] = np.asarray(self._ball_pos, dtype=np.float32)[keep]
+            ball_vel[rows[keep]] = np.asarray(self._ball_vel, dtype=np.float32)[keep]
+        
+        car_present = np.zeros((frame_count, car_count), dtype=bool)
+        car_pos = np.empty((frame_count, car_count, 3), dtype=np.float32)
+        car_pos[:] = CAR_DEFAULT_POS
+        car_rot = np.empty((frame_count, car_count, 4), dtype=np.float32)
+        car_rot[:] = CAR_DEFAULT_ROT
+        # Entier large: la saturation 0-255 est faite à l'écriture
+        car_boost = np.full((frame_count, car_count), CAR_DEFAULT_BOOST, dtype=np.int32)
+        if self._car_rows:
+            rows, cols = np.asarray(self._car_rows), np.asarray(self._car_cols)
+            keep = _last_occurrences(rows * car_count + cols)
+            index = (rows[keep], cols[keep])
+            car_present[index] = True
+            car_pos[index] = np.asarray(self._car_pos, dtype=np.float32)[keep]
+            car_rot[index] = np.asarray(self._car_rot, dtype=np.float32)[keep]
+            car_boost[index] = np.asarray(self._car_boost)[keep]
+        
+        self._arrays = {
+            "times": self.times,
+            "ball_pos": ball_pos,
+            "ball_vel": ball_vel,
+            "car_ids": list(self.car_ids),
+            "car_present": car_present,
+            "car_pos": car_pos,
+            "car_rot": car_rot,
+            "car_boost": car_boost,
+        }
+        return self._arrays
+    
+    def to_frames(self) -> List[Dict[str, Any]]:
+        """Adaptateur vers l'ancienne liste de frames (dicts), pour le code qui en dépend."""
+        arrays = dict(self.to_arrays())
+        arrays["deltas"] = np.zeros(len(self.times), dtype=np.float32)
+        arrays["ball_rot"] = np.broadcast_to(np.asarray((0, 0, 0, 1), dtype=np.float32), (len(self.times), 4))
+        arrays["car_boost"] = np.clip(arrays["car_boost"], 0, 255)
+        return frames_from_arrays(arrays)
 
 
 def extract_frames_from_schema(content_data: Dict[str, Any], player_actor_map: Dict[str, int], 
                                 fps: float, player_ids: List[str], 
-                                players_data: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], Dict[str, str]]:
+                                players_data: Dict[str, Any]) -> Tuple[FrameArrays, Dict[str, str]]:
     """
     Extrait les frames à partir des structures de données connues, sans générer de frames synthétiques.
     
     Tente d'extraire les frames depuis différentes structures connues du fichier JSON.
     Si aucune frame n'est trouvée, une erreur est levée au lieu de générer des frames synthétiques.
+    Les frames sont retournées sous forme de FrameArrays (tableaux numpy).
     """
-    frames = []
+    frames = FrameArrays([])
     car_player_map = {}
     
     # Vérification des données
     if not isinstance(players_data, dict):
-        print("[WARNING] Les données des joueurs ne sont pas un dictionnaire")
+        logger.warning("Les données des joueurs ne sont pas un dictionnaire")
         raise ValueError("Les données des joueurs ne sont pas correctement formatées")
     
     try:
-        # Essayer d'abord la structure network_frames (moderne)
-        if "network_frames" in content_data:
-            print("[INFO] Extraction des frames depuis network_frames")
-            frames, car_player_map = extract_frames_from_network_frames(content_data, player_actor_map, fps, player_ids, players_data)
-        
-        # Si pas de frames depuis network_frames, essayer la structure ticks (ancienne)
-        if not frames and "ticks" in content_data:
-            print("[INFO] Extraction des frames depuis ticks")
-            frames, car_player_map = extract_frames_from_ticks(content_data, player_actor_map, fps, player_ids, players_data)
-        
-        # Si toujours pas de frames, essayer la structure frames (alternative)
-        if not frames and "frames" in content_data:
-            print("[INFO] Extraction des frames depuis frames")
-            frames, car_player_map = extract_frames_from_direct(content_data, player_actor_map, fps, player_ids, players_data)
+        # Essayer chaque structure connue dans l'ordre, jusqu'à obtenir des frames
+        for key, extractor in FRAME_SOURCES:
+            if key in content_data:
+                logger.info("Extraction des frames depuis %s", key)
+                frames, car_player_map = extractor(content_data, player_actor_map, fps, player_ids, players_data)
+                if frames:
+                    break
         
         # Vérifier si des frames ont été extraites
         if not frames:
-            print("[ERROR] Aucune frame trouvée dans les structures connues")
+            logger.error("Aucune frame trouvée dans les structures connues")
             raise ValueError("Aucune frame trouvée dans les structures connues du fichier de replay")
         
-        print(f"[INFO] {len(frames)} frames extraites avec succès, {len(car_player_map)} voitures mappées")
+        logger.info("%d frames extraites avec succès, %d voitures mappées", len(frames), len(car_player_map))
         return frames, car_player_map
     
     except Exception as e:
-        print(f"[ERROR] Exception lors de l'extraction des frames: {e}")
-        traceback.print_exc()
+        logger.exception("Exception lors de l'extraction des frames: %s", e)
         # Au lieu de générer des frames synthétiques, propager l'erreur
         raise ValueError(f"Erreur lors de l'extraction des frames: {str(e)}")
 
+def _group_by_time(entries: List[Dict[str, Any]]) -> Tuple[Dict[Any, List[Dict[str, Any]]], List[float]]:
+    """
+    Indexe les entrées par timestamp en un seul passage (ordre d'origine conservé).
+    
+    Retourne l'index et la liste des timestamps triés, échantillonnés s'il y en a trop.
+    """
+    entries_by_time: Dict[Any, List[Dict[str, Any]]] = {}
+    for entry in entries:
+        if "time" in entry:
+            entries_by_time.setdefault(entry["time"], []).append(entry)
+    
+    if not entries_by_time:
+        return entries_by_time, []
+    return entries_by_time, sample_timestamps(np.unique(np.fromiter(entries_by_time, dtype=np.float64))).tolist()
+
 def extract_frames_from_network_frames(content_data: Dict[str, Any], player_actor_map: Dict[str, int], 
-                                     fps: float, player_ids: List[str], players_data: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], Dict[str, str]]:
+                                     fps: float, player_ids: List[str], players_data: Dict[str, Any]) -> Tuple[FrameArrays, Dict[str, str]]:
     """Extrait les frames à partir de la structure network_frames."""
-    frames = []
+    frames = FrameArrays([])
     car_player_map = {}
     
     if not content_data.get("network_frames"):
@@ -63,57 +272,39 @@ def extract_frames_from_network_frames(content_data: Dict[str, Any], player_acto
     try:
         network_frames = content_data["network_frames"]
         
-        # Collecter les timestamps uniques
-        timestamps = set()
-        for frame_data in network_frames:
-            if "time" in frame_data:
-                timestamps.add(frame_data["time"])
-        
-        if not timestamps:
-            print("[WARNING] Aucun timestamp trouvé dans network_frames")
+        frames_by_time, timestamp_list = _group_by_time(network_frames)
+        if not timestamp_list:
+            logger.warning("Aucun timestamp trouvé dans network_frames")
             return frames, car_player_map
         
-        # Convertir en liste et trier
-        timestamp_list = sorted(list(timestamps))
-        
-        # Si trop de timestamps, échantillonner
-        if len(timestamp_list) > 600:
-            sample_rate = len(timestamp_list) // 600
-            timestamp_list = [timestamp_list[i] for i in range(0, len(timestamp_list), sample_rate)]
-        
-        # Créer les frames
-        for time in timestamp_list:
-            frame = {
-                "time": time,
-                "ball": {"position": [0, 0, 93], "velocity": [0, 0, 0]},
-                "cars": {}
-            }
-            
-            # Trouver les données pour ce timestamp
-            for frame_data in network_frames:
-                if frame_data.get("time") == time:
-                    # Traiter la balle
-                    if "ball" in frame_data and isinstance(frame_data["ball"], dict):
-                        process_ball_data(frame_data["ball"], frame)
-                    
-                    # Traiter les voitures
-                    if "cars" in frame_data and isinstance(frame_data["cars"], dict):
-                        for car_id, car_data in frame_data["cars"].items():
-                            process_car_data(car_id, car_data, frame, car_player_map, player_actor_map, players_data)
-            
-            frames.append(frame)
+        # Créer les frames directement dans les tableaux
+        frames = FrameArrays(timestamp_list)
+        for i, time in enumerate(timestamp_list):
+            # Données pour ce timestamp
+            for frame_data in frames_by_time[time]:
+                # Traiter la balle
+                if "ball" in frame_data and type(frame_data["ball"]) is dict:
+                    frames.set_ball(i, *parse_ball_data(frame_data["ball"]))
+                
+                # Traiter les voitures
+                if "cars" in frame_data and type(frame_data["cars"]) is dict:
+                    for car_id, car_data in frame_data["cars"].items():
+                        if type(car_data) is not dict:
+                            continue
+                        player_id = resolve_car_player(car_id, car_player_map, player_actor_map, players_data)
+                        if player_id:
+                            frames.set_car(i, player_id, *parse_car_data(car_data))
         
         return frames, car_player_map
     
     except Exception as e:
-        print(f"[ERROR] Exception lors de l'extraction depuis network_frames: {e}")
-        traceback.print_exc()
-        return [], {}
+        logger.exception("Exception lors de l'extraction depuis network_frames: %s", e)
+        return FrameArrays([]), {}
 
 def extract_frames_from_ticks(content_data: Dict[str, Any], player_actor_map: Dict[str, int], 
-                             fps: float, player_ids: List[str], players_data: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], Dict[str, str]]:
+                             fps: float, player_ids: List[str], players_data: Dict[str, Any]) -> Tuple[FrameArrays, Dict[str, str]]:
     """Extrait les frames à partir de la structure ticks."""
-    frames = []
+    frames = FrameArrays([])
     car_player_map = {}
     
     if not content_data.get("ticks"):
@@ -122,62 +313,46 @@ def extract_frames_from_ticks(content_data: Dict[str, Any], player_actor_map: Di
     try:
         ticks = content_data["ticks"]
         
-        # Collecter les timestamps uniques
-        timestamps = set()
-        for tick in ticks:
-            if "time" in tick:
-                timestamps.add(tick["time"])
-        
-        if not timestamps:
-            print("[WARNING] Aucun timestamp trouvé dans ticks")
+        ticks_by_time, timestamp_list = _group_by_time(ticks)
+        if not timestamp_list:
+            logger.warning("Aucun timestamp trouvé dans ticks")
             return frames, car_player_map
         
-        # Convertir en liste et trier
-        timestamp_list = sorted(list(timestamps))
-        
-        # Si trop de timestamps, échantillonner
-        if len(timestamp_list) > 600:
-            sample_rate = len(timestamp_list) // 600
-            timestamp_list = [timestamp_list[i] for i in range(0, len(timestamp_list), sample_rate)]
-        
-        # Créer les frames
-        for time in timestamp_list:
-            frame = {
-                "time": time,
-                "ball": {"position": [0, 0, 93], "velocity": [0, 0, 0]},
-                "cars": {}
-            }
-            
-            # Trouver les données pour ce timestamp
-            for tick in ticks:
-                if tick.get("time") == time:
-                    # Traiter les acteurs
-                    if "actors" in tick and isinstance(tick["actors"], dict):
-                        for actor_id, actor_data in tick["actors"].items():
-                            # Traiter la balle
-                            if actor_data.get("type") == "ball":
-                                process_ball_data(actor_data, frame)
-                            
-                            # Traiter les voitures
-                            elif actor_data.get("type") == "car":
-                                # Déterminer si cet acteur est associé à un joueur
-                                if int(actor_id) in player_actor_map:
-                                    player_id = player_actor_map[int(actor_id)]
-                                    process_car_data(actor_id, actor_data, frame, car_player_map, player_actor_map, players_data, player_id)
-            
-            frames.append(frame)
+        # Créer les frames directement dans les tableaux
+        frames = FrameArrays(timestamp_list)
+        for i, time in enumerate(timestamp_list):
+            # Données pour ce timestamp
+            for tick in ticks_by_time[time]:
+                # Traiter les acteurs
+                if "actors" in tick and type(tick["actors"]) is dict:
+                    for actor_id, actor_data in tick["actors"].items():
+                        # Type de l'acteur lu une seule fois
+                        actor_type = actor_data.get("type")
+                        
+                        # Traiter la balle
+                        if actor_type == "ball":
+                            frames.set_ball(i, *parse_ball_data(actor_data))
+                        
+                        # Traiter les voitures
+                        elif actor_type == "car":
+                            # Déterminer si cet acteur est associé à un joueur
+                            direct_player_id = player_actor_map.get(int(actor_id))
+                            if direct_player_id is not None:
+                                player_id = resolve_car_player(actor_id, car_player_map, player_actor_map,
+                                                               players_data, direct_player_id)
+                                if player_id:
+                                    frames.set_car(i, player_id, *parse_car_data(actor_data))
         
         return frames, car_player_map
     
     except Exception as e:
-        print(f"[ERROR] Exception lors de l'extraction depuis ticks: {e}")
-        traceback.print_exc()
-        return [], {}
+        logger.exception("Exception lors de l'extraction depuis ticks: %s", e)
+        return FrameArrays([]), {}
 
 def extract_frames_from_direct(content_data: Dict[str, Any], player_actor_map: Dict[str, int], 
-                              fps: float, player_ids: List[str], players_data: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], Dict[str, str]]:
+                              fps: float, player_ids: List[str], players_data: Dict[str, Any]) -> Tuple[FrameArrays, Dict[str, str]]:
     """Extrait les frames à partir de la structure frames directe."""
-    frames = []
+    frames = FrameArrays([])
     car_player_map = {}
     
     if not content_data.get("frames"):
@@ -197,66 +372,134 @@ def extract_frames_from_direct(content_data: Dict[str, Any], player_actor_map: D
             duration = content_data.get("duration", 300)
             timestamps = [i / fps for i in range(int(duration * fps))]
         
-        # Si trop de timestamps, échantillonner
-        if len(timestamps) > 600:
-            sample_rate = len(timestamps) // 600
-            timestamps = [timestamps[i] for i in range(0, len(timestamps), sample_rate)]
+        # Si trop de timestamps, échantillonner uniformément dans le temps
+        # (par pas d'index si les timestamps ne sont pas triés)
+        times = np.asarray(timestamps, dtype=np.float64)
+        if len(times) > MAX_FRAMES and np.all(np.diff(times) >= 0):
+            indices = sample_indices(times)
+        elif len(times) > MAX_FRAMES:
+            indices = np.arange(0, len(times), len(times) // MAX_FRAMES)
+        else:
+            indices = np.arange(len(times))
         
-        # Créer les frames
-        for i, time in enumerate(timestamps):
-            frame = {
-                "time": time,
-                "ball": {"position": [0, 0, 93], "velocity": [0, 0, 0]},
-                "cars": {}
-            }
+        # Créer les frames directement dans les tableaux
+        frames = FrameArrays(times[indices].tolist())
+        for i, source_index in enumerate(indices.tolist()):
+            if source_index >= len(direct_frames):
+                break
+            # Obtenir les données de la frame d'origine du timestamp échantillonné
+            frame_data = direct_frames[source_index]
             
-            # Obtenir les données de frame correspondantes
-            if i < len(direct_frames):
-                frame_data = direct_frames[i]
-                
-                # Traiter la balle
-                if "ball" in frame_data and isinstance(frame_data["ball"], dict):
-                    process_ball_data(frame_data["ball"], frame)
-                
-                # Traiter les voitures
-                if "cars" in frame_data and isinstance(frame_data["cars"], dict):
-                    for car_id, car_data in frame_data["cars"].items():
-                        process_car_data(car_id, car_data, frame, car_player_map, player_actor_map, players_data)
+            # Traiter la balle
+            if "ball" in frame_data and type(frame_data["ball"]) is dict:
+                frames.set_ball(i, *parse_ball_data(frame_data["ball"]))
             
-            frames.append(frame)
+            # Traiter les voitures
+            if "cars" in frame_data and type(frame_data["cars"]) is dict:
+                for car_id, car_data in frame_data["cars"].items():
+                    if type(car_data) is not dict:
+                        continue
+                    player_id = resolve_car_player(car_id, car_player_map, player_actor_map, players_data)
+                    if player_id:
+                        frames.set_car(i, player_id, *parse_car_data(car_data))
         
         return frames, car_player_map
     
     except Exception as e:
-        print(f"[ERROR] Exception lors de l'extraction directe des frames: {e}")
-        traceback.print_exc()
-        return [], {}
+        logger.exception("Exception lors de l'extraction directe des frames: %s", e)
+        return FrameArrays([]), {}
+
+# Structures de frames connues, par ordre de préférence: network_frames (moderne),
+# ticks (ancienne), puis frames (alternative)
+FRAME_SOURCES = (
+    ("network_frames", extract_frames_from_network_frames),
+    ("ticks", extract_frames_from_ticks),
+    ("frames", extract_frames_from_direct),
+)
+
+def _first_list(data: Dict[str, Any], keys: Tuple[str, ...], size: int) -> Optional[List[float]]:
+    """Retourne les `size` premières valeurs du premier alias dont la valeur est une liste."""
+    for key in keys:
+        value = data.get(key)
+        if type(value) is list:
+            return value[:size]
+    return None
+
+def parse_ball_data(ball_data: Dict[str, Any]) -> Tuple[Optional[List[float]], Optional[List[float]]]:
+    """
+    Extrait la position et la vitesse d'une balle (None si absentes).
+    """
+    return (_first_list(ball_data, POSITION_KEYS, 3),
+            _first_list(ball_data, VELOCITY_KEYS, 3))
 
 def process_ball_data(ball_data: Dict[str, Any], frame: Dict[str, Any]) -> None:
     """
     Traite les données d'une balle et les ajoute à la frame.
     """
-    if not isinstance(ball_data, dict):
+    if type(ball_data) is not dict:
         return
     
-    ball_state = {
-        "position": [0, 0, 93],  # Position par défaut
-        "velocity": [0, 0, 0]    # Vitesse par défaut
+    position, velocity = parse_ball_data(ball_data)
+    frame["ball"] = {
+        "position": position if position is not None else list(BALL_DEFAULT_POS),
+        "velocity": velocity if velocity is not None else list(BALL_DEFAULT_VEL)
     }
+
+def _parse_car_actor_id(car_id_str: str) -> Optional[int]:
+    """Extrait l'ID d'acteur d'une clé de voiture ("car_12" ou "12"), None si impossible."""
+    try:
+        if car_id_str.startswith("car_"):
+            return int(car_id_str.split("_")[1])
+        return int(car_id_str)
+    except (ValueError, IndexError):
+        return None
+
+def resolve_car_player(car_id_str: str, car_player_map: Dict[str, str], actor_player_map: Dict[int, str],
+                       players_data: Dict[str, Any], direct_player_id: Optional[str] = None) -> Optional[str]:
+    """
+    Détermine le joueur associé à une voiture et met à jour car_player_map.
+    
+    L'association est stable sur tout le replay: elle n'est résolue qu'à la première frame.
+    """
+    player_id = car_player_map.get(car_id_str)
+    
+    # 1. Utiliser l'ID direct si fourni
+    if player_id is None and direct_player_id is not None:
+        # Vérifier si cet ID est dans players_data
+        if direct_player_id in players_data:
+            player_id = direct_player_id
+            car_player_map[car_id_str] = player_id
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Association directe: %s -> %s", car_id_str, player_id)
     
-    # Position - différents formats possibles
-    if "position" in ball_data and isinstance(ball_data["position"], list):
-        ball_state["position"] = ball_data["position"][:3]
-    elif "loc" in ball_data and isinstance(ball_data["loc"], list):
-        ball_state["position"] = ball_data["loc"][:3]
+    # 2. Essayer de trouver l'ID d'acteur dans la clé de voiture
+    if player_id is None:
+        car_actor_id = _parse_car_actor_id(car_id_str)
+        if car_actor_id is not None and car_actor_id in actor_player_map:
+            player_id = actor_player_map[car_actor_id]
+            car_player_map[car_id_str] = player_id
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Association par clé de voiture: %s -> %s", car_id_str, player_id)
     
-    # Vitesse - différents formats possibles
-    if "velocity" in ball_data and isinstance(ball_data["velocity"], list):
-        ball_state["velocity"] = ball_data["velocity"][:3]
-    elif "vel" in ball_data and isinstance(ball_data["vel"], list):
-        ball_state["velocity"] = ball_data["vel"][:3]
+    return player_id
+
+def parse_car_data(car_data: Dict[str, Any]) -> Tuple[Optional[List[float]], Optional[List[float]], Optional[int]]:
+    """
+    Extrait la position, la rotation et le boost d'une voiture (None si absents).
+    """
+    # Boost - seule la première clé présente est utilisée, même si sa valeur est invalide
+    boost = None
+    for key in BOOST_KEYS:
+        if key in car_data:
+            try:
+                boost = int(car_data[key])
+            except (ValueError, TypeError):
+                pass
+            break
     
-    frame["ball"] = ball_state
+    return (_first_list(car_data, POSITION_KEYS, 3),
+            _first_list(car_data, ROTATION_KEYS, 4),
+            boost)
 
 def process_car_data(car_id_str: str, car_data: Dict[str, Any], frame: Dict[str, Any], 
                     car_player_map: Dict[str, str], actor_player_map: Dict[int, str], 
@@ -273,70 +516,16 @@ def process_car_data(car_id_str: str, car_data: Dict[str, Any], frame: Dict[str,
         players_data: Données des joueurs
         direct_player_id: ID de joueur direct si disponible
     """
-    if not isinstance(car_data, dict):
+    if type(car_data) is not dict:
         return
     
-    # Déterminer le joueur associé à cette voiture
-    player_id = None
-    
-    # 1. Utiliser l'ID direct si fourni
-    if direct_player_id is not None:
-        # Vérifier si cet ID est dans players_data
-        if direct_player_id in players_data:
-            player_id = direct_player_id
-            car_player_map[car_id_str] = player_id
-            print(f"[DEBUG] Association directe: {car_id_str} -> {player_id}")
-    
-    # 2. Essayer de trouver l'ID d'acteur dans la clé de voiture
-    if player_id is None:
-        car_actor_id = None
-        if car_id_str.startswith("car_"):
-            try:
-                car_actor_id = int(car_id_str.split("_")[1])
-            except (ValueError, IndexError):
-                pass
-        else:
-            try:
-                car_actor_id = int(car_id_str)
-            except ValueError:
-                pass
-        
-        if car_actor_id is not None and car_actor_id in actor_player_map:
-            player_id = actor_player_map[car_actor_id]
-            car_player_map[car_id_str] = player_id
-            print(f"[DEBUG] Association par clé de voiture: {car_id_str} -> {player_id}")
+    player_id = resolve_car_player(car_id_str, car_player_map, actor_player_map, players_data, direct_player_id)
     
     # Si on a trouvé un joueur, ajouter les données de la voiture à la frame
     if player_id:
-        car_state = {
-            "position": [0, 0, 17],  # Position par défaut
-            "rotation": [0, 0, 0, 1],  # Quaternion par défaut
-            "boost": 33  # Boost par défaut
+        position, rotation, boost = parse_car_data(car_data)
+        frame["cars"][player_id] = {
+            "position": position if position is not None else list(CAR_DEFAULT_POS),
+            "rotation": rotation if rotation is not None else list(CAR_DEFAULT_ROT),
+            "boost": boost if boost is not None else CAR_DEFAULT_BOOST
         }
-        
-        # Position - différents formats possibles
-        if "position" in car_data and isinstance(car_data["position"], list):
-            car_state["position"] = car_data["position"][:3]
-        elif "loc" in car_data and isinstance(car_data["loc"], list):
-            car_state["position"] = car_data["loc"][:3]
-        
-        # Rotation - différents formats possibles
-        if "rotation" in car_data and isinstance(car_data["rotation"], list):
-            car_state["rotation"] = car_data["rotation"][:4]
-        elif "rot" in car_data and isinstance(car_data["rot"], list):
-            car_state["rotation"] = car_data["rot"][:4]
-        
-        # Boost - différents formats possibles
-        if "boost" in car_data:
-            try:
-                car_state["boost"] = int(car_data["boost"])
-            except (ValueError, TypeError):
-                pass
-        elif "boost_amount" in car_data:
-            try:
-                car_state["boost"] = int(car_data["boost_amount"])
-            except (ValueError, TypeError):
-                pass
-        
-        # Ajouter la voiture à la frame
-        frame["cars"][player_id] = car_state 
\ No newline at end of file
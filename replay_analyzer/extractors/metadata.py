@@ -1,94 +1,164 @@
 import json
-import traceback
-from typing import Dict, Any, Tuple, List, Optional
+import logging
+from collections import deque
+from operator import itemgetter
+from typing import Callable, Dict, Any, Tuple, List, Optional
 
 from replay_analyzer.models.replay import TeamStats, PlayerInfo, PlayerStatsDetails, TimelineEvent
 from replay_analyzer.models.frames import ReplayDataProcessed
-from replay_analyzer.utils.helpers import get_prop_value, normalize_player_id
+from replay_analyzer.utils.helpers import get_prop_value, normalize_player_id, player_stats_ids
+
+
+logger = logging.getLogger(__name__)
+
+# Clé de tri des événements de la timeline
+_TIME_KEY = itemgetter("time")
 
 
 def find_players_and_teams(data: Dict, depth: int = 0, max_depth: int = 10) -> Dict[str, Dict]:
     """
-    Fonction récursive qui explore la structure de données pour trouver les joueurs et les équipes.
+    Explore la structure de données pour trouver les joueurs et les équipes.
+    
+    Le parcours est itératif (pile explicite, ordre préfixe) et écrit directement
+    dans un seul dictionnaire de résultats, sans fusion à chaque niveau.
     
     Args:
         data: Données à explorer
-        depth: Profondeur actuelle de récursion
-        max_depth: Profondeur maximale de récursion pour éviter une récursion infinie
+        depth: Profondeur de départ
+        max_depth: Profondeur maximale d'exploration pour éviter un parcours infini
     
     Returns:
         Dict avec deux clés: "players" et "teams" contenant les données trouvées
     """
-    # Résultats pour stocker les données trouvées
-    result = {"players": {}, "teams": {}}
+    players: Dict[Any, Dict] = {}
+    teams: Dict[Any, Dict] = {}
+    result = {"players": players, "teams": teams}
     
-    # Éviter une récursion excessive ou des données invalides
-    if depth > max_depth or data is None:
-        return result
+    stack = deque([(data, depth)])
+    pop = stack.pop
+    push = stack.append
     
-    # Si nous avons un dictionnaire, explorer ses clés
-    if isinstance(data, dict):
-        # Vérifier si c'est un dictionnaire qui contient directement des données de joueur
-        if "name" in data and "team" in data:
-            player_id = data.get("id", f"player_{len(result['players'])}")
-            result["players"][player_id] = data
-        
-        # Vérifier si c'est un dictionnaire qui contient directement des données d'équipe
-        elif "score" in data and ("id" in data or "team_num" in data):
-            team_id = data.get("id", data.get("team_num", f"team_{len(result['teams'])}"))
-            result["teams"][team_id] = data
+    while stack:
+        node, node_depth = pop()
+        if node_depth > max_depth:
+            continue
         
-        # Explorer récursivement toutes les clés
-        for key, value in data.items():
-            # Si la clé indique des joueurs ou des équipes, explorer plus profondément
-            if key in ["players", "teams", "PlayerStats", "Teams"]:
-                # Vérifier que la valeur est valide pour la récursion
-                if isinstance(value, (dict, list)):
-                    try:
-                        sub_results = find_players_and_teams(value, depth + 1, max_depth)
-                        # Fusionner les résultats
-                        result["players"].update(sub_results["players"])
-                        result["teams"].update(sub_results["teams"])
-                    except Exception as e:
-                        print(f"[WARNING] Erreur lors de l'exploration de {key}: {e}")
-            elif isinstance(value, (dict, list)):
-                # Explorer récursivement
-                try:
-                    sub_results = find_players_and_teams(value, depth + 1, max_depth)
-                    # Fusionner les résultats
-                    result["players"].update(sub_results["players"])
-                    result["teams"].update(sub_results["teams"])
-                except Exception as e:
-                    print(f"[WARNING] Erreur lors de l'exploration récursive: {e}")
-    
-    # Si nous avons une liste, explorer chaque élément
-    elif isinstance(data, list):
-        # Vérifier si c'est une liste qui contient directement des données de joueur ou d'équipe
-        for i, item in enumerate(data):
-            if isinstance(item, dict):
-                # Si c'est un joueur
-                if "name" in item and "team" in item:
-                    player_id = item.get("id", f"player_{len(result['players'])}")
-                    result["players"][player_id] = item
+        # Une erreur sur un nœud n'abandonne que ce sous-arbre, pas tout le parcours
+        try:
+            node_type = type(node)
+            if node_type is dict:
+                # Dictionnaire contenant directement des données de joueur
+                if "name" in node and "team" in node:
+                    players[node.get("id", f"player_{len(players)}")] = node
                 
-                # Si c'est une équipe
-                elif "score" in item and ("id" in item or "team_num" in item):
-                    team_id = item.get("id", item.get("team_num", f"team_{len(result['teams'])}"))
-                    result["teams"][team_id] = item
+                # Dictionnaire contenant directement des données d'équipe
+                elif "score" in node and ("id" in node or "team_num" in node):
+                    teams[node.get("id", node.get("team_num", f"team_{len(teams)}"))] = node
+                
+                children = node.values()
+            elif node_type is list:
+                children = node
+            else:
+                continue
             
-            # Explorer récursivement chaque élément valide
-            if isinstance(item, (dict, list)):
-                try:
-                    sub_results = find_players_and_teams(item, depth + 1, max_depth)
-                    # Fusionner les résultats
-                    result["players"].update(sub_results["players"])
-                    result["teams"].update(sub_results["teams"])
-                except Exception as e:
-                    print(f"[WARNING] Erreur lors de l'exploration de l'élément {i}: {e}")
+            # Empiler en ordre inverse pour conserver l'ordre de parcours d'origine
+            for child in reversed(children):
+                child_type = type(child)
+                if child_type is dict or child_type is list:
+                    push((child, node_depth + 1))
+        except Exception as e:
+            logger.warning("Erreur lors de l'exploration des joueurs et équipes: %s", e)
     
     return result
 
 
+def _set_if_kind(field: str, expected_kind: str, convert: Callable[[Any], Any] = lambda v: v) -> Callable[[Dict[str, Any], Any, str], None]:
+    """Crée un handler qui enregistre la valeur dans `field` si le type de propriété correspond."""
+    def handler(state: Dict[str, Any], value: Any, kind: str) -> None:
+        if kind == expected_kind:
+            state[field] = convert(value)
+    return handler
+
+
+def _set_stat(stat: str) -> Callable[[Dict[str, Any], Any, str], None]:
+    """Crée un handler qui enregistre une statistique entière du joueur."""
+    def handler(state: Dict[str, Any], value: Any, kind: str) -> None:
+        if kind == 'IntProperty':
+            state['stats'][stat] = value
+    return handler
+
+
+# Champ d'ID associé aux noms de plateforme connus de rrrocket
+_UID_FIELD_BY_PLATFORM: Dict[str, str] = {
+    'OnlinePlatform_Steam': 'steam_id',
+    'OnlinePlatform_PS4': 'psn_id',
+    'OnlinePlatform_XboxOne': 'xbox_id',
+}
+
+
+def _uid_field(platform: Any) -> Optional[str]:
+    """Retourne le champ d'ID (steam_id, psn_id, xbox_id) correspondant à une plateforme."""
+    if type(platform) is str:
+        id_field = _UID_FIELD_BY_PLATFORM.get(platform)
+        if id_field:
+            return id_field
+    # Noms de plateforme moins courants : reconnaissance par sous-chaîne
+    if 'Steam' in platform:
+        return 'steam_id'
+    if 'PS4' in platform or 'PSN' in platform:
+        return 'psn_id'
+    if 'Xbox' in platform:
+        return 'xbox_id'
+    return None
+
+
+def _handle_unique_id(state: Dict[str, Any], value: Any, kind: str) -> None:
+    """Récupère la plateforme et les IDs spécifiques à la plateforme depuis UniqueId."""
+    if kind != 'StructProperty' or type(value) is not dict or 'fields' not in value:
+        return
+    
+    unique_fields = value.get('fields', {})
+    if 'Platform' in unique_fields:
+        state['platform'] = unique_fields.get('Platform')
+    platform = state['platform']
+    
+    # Récupérer les IDs spécifiques à la plateforme
+    if platform and 'Uid' in unique_fields:
+        uid = unique_fields.get('Uid')
+        if uid and str(uid) != "0":
+            id_field = _uid_field(platform)
+            if id_field:
+                state['stats'][id_field] = str(uid)
+    
+    # Récupérer spécifiquement l'EpicID
+    if 'EpicAccountId' in unique_fields:
+        epic_id = unique_fields.get('EpicAccountId')
+        if epic_id:
+            state['stats']['epic_id'] = str(epic_id)
+
+
+# Handlers des sous-propriétés d'une entrée PlayerStats, indexés par nom de propriété
+_PLAYER_HANDLERS: Dict[str, Callable[[Dict[str, Any], Any, str], None]] = {
+    'OnlineID': _set_if_kind('online_id', 'QWordProperty', str),
+    'Name': _set_if_kind('name', 'StrProperty'),
+    'PlayerID': _set_if_kind('actor_id', 'IntProperty'),  # C'est l'ID d'acteur
+    'bBot': _set_if_kind('is_bot', 'BoolProperty'),
+    'Platform': _set_if_kind('platform', 'StrProperty'),
+    'Score': _set_stat('score'),
+    'Goals': _set_stat('goals'),
+    'Assists': _set_stat('assists'),
+    'Saves': _set_stat('saves'),
+    'Shots': _set_stat('shots'),
+    'UniqueId': _handle_unique_id,
+}
+
+# Handlers des sous-propriétés d'une entrée Teams
+_TEAM_HANDLERS: Dict[str, Callable[[Dict[str, Any], Any, str], None]] = {
+    'Score': _set_if_kind('score', 'IntProperty'),
+    'TeamName': _set_if_kind('name', 'NameProperty'),
+}
+
+
 def find_players_and_teams_from_schema(header_data: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any], Dict[str, int]]:
     """Extracts players and teams directly from header properties based on schema."""
     players: Dict[str, Any] = {}
@@ -96,72 +166,48 @@ def find_players_and_teams_from_schema(header_data: Dict[str, Any]) -> Tuple[Dic
     player_actor_map: Dict[str, int] = {} # Map OnlineID/PlayerKey (str) to ActorID (int)
 
     if not isinstance(header_data, dict) or 'properties' not in header_data or 'elements' not in header_data['properties']:
-        print("[WARNING] Header properties not found or invalid structure for schema parsing.")
+        logger.warning("Header properties not found or invalid structure for schema parsing.")
         return players, teams, player_actor_map
 
-    print("[INFO] Parsing header properties for players and teams...")
+    logger.info("Parsing header properties for players and teams...")
     header_props = header_data['properties']['elements']
+    _gpv = get_prop_value  # Référence locale, appelée pour chaque sous-propriété
 
-    actor_id_prop_map: Dict[str, int] = {}
     player_name_to_id_map: Dict[str, str] = {}  # Pour faire correspondre les noms aux IDs
+    # Paires (nom, équipe) vues dans les PRI_TA, appliquées une fois tous les joueurs connus
+    pending_pri: List[Tuple[str, int]] = []
 
-    # --- Premier passage : Explorer toutes les propriétés pour repérer les IDs d'acteurs et les correspondances ---
-    print("[DEBUG] Scanning all properties for actor IDs and player data...")
+    # --- Passage unique : joueurs, équipes et correspondances PRI_TA ---
+    logger.debug("Scanning all properties for actor IDs and player data...")
     for key, prop_data in header_props:
+        kind = prop_data.get('kind')
+
         # PlayerStats contient à la fois les noms et les IDs d'acteurs
-        if key == 'PlayerStats' and prop_data.get('kind') == 'ArrayProperty':
-            player_stats_array = get_prop_value(prop_data)
-            if isinstance(player_stats_array, list):
+        if key == 'PlayerStats' and kind == 'ArrayProperty':
+            player_stats_array = _gpv(prop_data)
+            if type(player_stats_array) is list:
                 for player_prop_list in player_stats_array:
-                    if isinstance(player_prop_list, dict) and 'elements' in player_prop_list:
-                        online_id: Optional[str] = None
-                        player_name: Optional[str] = None
-                        actor_id: Optional[int] = None
-                        platform: Optional[str] = None
-                        player_stats = {}
-                        is_bot = False
+                    if type(player_prop_list) is dict and 'elements' in player_prop_list:
+                        state: Dict[str, Any] = {
+                            'online_id': None,
+                            'name': None,
+                            'actor_id': None,
+                            'platform': None,
+                            'is_bot': False,
+                            'stats': {}
+                        }
 
                         for sub_key, sub_prop in player_prop_list['elements']:
-                            sub_value = get_prop_value(sub_prop)
-                            kind = sub_prop.get('kind')
-                            
-                            if sub_key == 'OnlineID' and kind == 'QWordProperty':
-                                online_id = str(sub_value)
-                            elif sub_key == 'Name' and kind == 'StrProperty':
-                                player_name = sub_value
-                            elif sub_key == 'PlayerID' and kind == 'IntProperty':  # C'est l'ID d'acteur
-                                actor_id = sub_value
-                            elif sub_key == 'bBot' and kind == 'BoolProperty':
-                                is_bot = sub_value
-                            elif sub_key == 'Platform' and kind == 'StrProperty':
-                                platform = sub_value
-                            # Collecter les statistiques du joueur
-                            elif kind == 'IntProperty' and sub_key in ['Score', 'Goals', 'Assists', 'Saves', 'Shots']:
-                                player_stats[sub_key.lower()] = sub_value
-                            # Collecter les données d'identification supplémentaires
-                            elif sub_key == 'UniqueId' and kind == 'StructProperty':
-                                # Récupérer les données spécifiques à la plateforme
-                                if isinstance(sub_value, dict) and 'fields' in sub_value:
-                                    unique_fields = sub_value.get('fields', {})
-                                    if 'Platform' in unique_fields:
-                                        platform = unique_fields.get('Platform')
-                                    
-                                    # Récupérer les IDs spécifiques à la plateforme
-                                    if platform and 'Uid' in unique_fields:
-                                        uid = unique_fields.get('Uid')
-                                        if uid and str(uid) != "0":
-                                            if 'Steam' in platform:
-                                                player_stats['steam_id'] = str(uid)
-                                            elif 'PS4' in platform or 'PSN' in platform:
-                                                player_stats['psn_id'] = str(uid)
-                                            elif 'Xbox' in platform:
-                                                player_stats['xbox_id'] = str(uid)
-                                    
-                                    # Récupérer spécifiquement l'EpicID
-                                    if 'EpicAccountId' in unique_fields:
-                                        epic_id = unique_fields.get('EpicAccountId')
-                                        if epic_id:
-                                            player_stats['epic_id'] = str(epic_id)
+                            handler = _PLAYER_HANDLERS.get(sub_key)
+                            if handler:
+                                handler(state, _gpv(sub_prop), sub_prop.get('kind'))
+
+                        online_id = state['online_id']
+                        player_name = state['name']
+                        actor_id = state['actor_id']
+                        platform = state['platform']
+                        is_bot = state['is_bot']
+                        player_stats = state['stats']
 
                         # Générer une clé unique pour ce joueur
                         player_key = online_id if online_id and online_id != "0" else player_name
@@ -175,7 +221,7 @@ def find_players_and_teams_from_schema(header_data: Dict[str, Any]) -> Tuple[Dic
                             if player_key not in players:
                                 players[player_key] = {
                                     'name': player_name,
-                                    'team': None,  # Sera rempli dans la deuxième passe
+                                    'team': None,  # Sera rempli après le passage via les PRI_TA
                                     'is_bot': is_bot,
                                     'platform': platform,
                                     'stats': player_stats
@@ -197,26 +243,24 @@ def find_players_and_teams_from_schema(header_data: Dict[str, Any]) -> Tuple[Dic
                                 player_actor_map[player_key] = actor_id
                                 if 'actor_id' not in players[player_key]:
                                     players[player_key]['actor_id'] = actor_id
-                                print(f"[DEBUG] Mapped player '{player_key}' to actor ID {actor_id}")
+                                logger.debug("Mapped player '%s' to actor ID %s", player_key, actor_id)
 
         # Teams contient les données d'équipe
-        elif key == 'Teams' and prop_data.get('kind') == 'ArrayProperty':
-            teams_array = get_prop_value(prop_data)
-            if isinstance(teams_array, list):
+        elif key == 'Teams' and kind == 'ArrayProperty':
+            teams_array = _gpv(prop_data)
+            if type(teams_array) is list:
                 for team_idx, team_prop_list in enumerate(teams_array):
-                    if isinstance(team_prop_list, dict) and 'elements' in team_prop_list:
+                    if type(team_prop_list) is dict and 'elements' in team_prop_list:
                         team_id = str(team_idx)
-                        team_name = None
-                        team_score = 0
+                        team_state: Dict[str, Any] = {'name': None, 'score': 0}
                         
                         for sub_key, sub_prop in team_prop_list['elements']:
-                            sub_value = get_prop_value(sub_prop)
-                            kind = sub_prop.get('kind')
-                            
-                            if sub_key == 'Score' and kind == 'IntProperty':
-                                team_score = sub_value
-                            elif sub_key == 'TeamName' and kind == 'NameProperty':
-                                team_name = sub_value
+                            handler = _TEAM_HANDLERS.get(sub_key)
+                            if handler:
+                                handler(team_state, _gpv(sub_prop), sub_prop.get('kind'))
+                        
+                        team_name = team_state['name']
+                        team_score = team_state['score']
                         
                         # Ajouter l'équipe
                         teams[team_id] = {
@@ -224,76 +268,92 @@ def find_players_and_teams_from_schema(header_data: Dict[str, Any]) -> Tuple[Dic
                             'name': team_name if team_name else f"Team {team_idx}",
                             'score': team_score
                         }
-                        print(f"[DEBUG] Added team {team_id}: {team_name}, score: {team_score}")
+                        logger.debug("Added team %s: %s, score: %s", team_id, team_name, team_score)
         
         # PRI_TA (Archetype PlayerReplicationInfo) contient souvent la correspondance joueur/équipe
-        elif key.startswith('PRI_TA') and prop_data.get('kind') == 'ObjectProperty':
-            pri_data = get_prop_value(prop_data)
-            if isinstance(pri_data, dict) and 'properties' in pri_data and 'elements' in pri_data['properties']:
+        elif key.startswith('PRI_TA') and kind == 'ObjectProperty':
+            pri_data = _gpv(prop_data)
+            if type(pri_data) is dict and 'properties' in pri_data and 'elements' in pri_data['properties']:
                 player_name = None
                 team_num = None
-                actor_id = None
-                
-                # Essayer d'extraire l'actorId de l'objet lui-même
-                if 'actor_id' in pri_data:
-                    actor_id = pri_data['actor_id']
                 
                 for sub_key, sub_prop in pri_data['properties']['elements']:
-                    sub_value = get_prop_value(sub_prop)
-                    kind = sub_prop.get('kind')
+                    sub_value = _gpv(sub_prop)
+                    sub_kind = sub_prop.get('kind')
                     
-                    if sub_key == 'PlayerName' and kind in ['StrProperty', 'NameProperty']:
+                    if sub_key == 'PlayerName' and sub_kind in ['StrProperty', 'NameProperty']:
                         player_name = sub_value
-                    elif sub_key == 'Team' and kind == 'ObjectProperty':
+                    elif sub_key == 'Team' and sub_kind == 'ObjectProperty':
                         # Essayer d'extraire l'équipe du joueur
-                        if isinstance(sub_value, dict) and 'actor_id' in sub_value:
+                        if type(sub_value) is dict and 'actor_id' in sub_value:
                             # Format possible: TeamID = actor_id % 2
                             team_actor_id = sub_value['actor_id']
                             team_num = team_actor_id % 2  # 0 = Bleu, 1 = Orange
-                    elif sub_key == 'TeamNum' and kind == 'IntProperty':
+                    elif sub_key == 'TeamNum' and sub_kind == 'IntProperty':
                         team_num = sub_value
                 
-                # Si nous avons un nom de joueur et une équipe, mettre à jour les données du joueur
+                # Le joueur peut apparaître après son PRI_TA : résolution différée
                 if player_name and team_num is not None:
-                    # Trouver le joueur par son nom
-                    if player_name in player_name_to_id_map:
-                        player_key = player_name_to_id_map[player_name]
-                        if player_key in players:
-                            players[player_key]['team'] = team_num
-                        player_key = online_id if online_id is not None and online_id != "0" else player_name # Use OnlineID if valid, else name
-                        if player_key is not None and actor_id is not None:
-                            print(f"[DEBUG]   Mapped Player Key '{player_key}' to Actor ID {actor_id}")
-                            actor_id_prop_map[player_key] = actor_id
+                    pending_pri.append((player_name, team_num))
+
+    # Appliquer les équipes une fois tous les noms de joueurs connus
+    for player_name, team_num in pending_pri:
+        player_key = player_name_to_id_map.get(player_name)
+        if player_key in players:
+            players[player_key]['team'] = team_num
+
+    return players, teams, player_actor_map
+
+def _players_and_teams_from_player_stats(player_stats: List[Any], props: Dict[str, Any]) -> Dict[str, Dict]:
+    """
+    Construit joueurs et équipes à partir de la propriété PlayerStats de rrrocket.
     
-    # --- Deuxième passage : Extraire les équipes et les joueurs, en utilisant les correspondances d'acteur ---
-    print("[DEBUG] Second Pass: Extracting Team and Player Data...")
-    for key, prop_data in header_props:
-        prop_value = get_prop_value(prop_data)
-
-        # Extract Teams
-        if key == 'Teams' and prop_data.get('kind') == 'ArrayProperty' and isinstance(prop_value, list):
-            print(f"[DEBUG] Processing Teams Property (found {len(prop_value)} entries)")
-            for team_index, team_prop_list in enumerate(prop_value):
-                if isinstance(team_prop_list, dict) and 'elements' in team_prop_list:
-                    team_data: Dict[str, Any] = {'id': str(team_index)}
-                    print(f"[DEBUG]  Processing Team Index {team_index}")
-                    for sub_key, sub_prop in team_prop_list['elements']:
-                        sub_value = get_prop_value(sub_prop)
-                        kind = sub_prop.get('kind')
-                        if sub_key == 'Score' and kind == 'IntProperty':
-                            team_data['score'] = sub_value
-                            print(f"[DEBUG]    Found Score: {sub_value}")
-                        elif sub_key == 'TeamName' and kind == 'NameProperty':
-                            team_data['name'] = sub_value
-                    if 'score' in team_data: # Only add if score was found
-                        teams[str(team_index)] = team_data
-                    else:
-                        print(f"[WARNING] Team index {team_index} processed, but no 'Score' found.")
+    Retourne la même structure que find_players_and_teams, sans parcourir tout le document.
+    """
+    players: Dict[str, Dict] = {}
+    for idx, stat in enumerate(player_stats):
+        if type(stat) is not dict:
+            continue
+        g = stat.get
+        
+        platform = g("Platform")
+        if type(platform) is dict:
+            platform = platform.get("value")
+        
+        # Mêmes identifiants que _build_replay_metadata, pour des IDs normalisés identiques
+        epic_id, steam_id = player_stats_ids(stat)
+        
+        players[f"player_{idx}"] = {
+            "name": g("Name", f"Joueur {idx}"),
+            "team": g("Team", 0),
+            "platform": platform,
+            "is_bot": g("bBot", False),
+            "epic_id": str(epic_id) if epic_id else None,
+            "steam_id": str(steam_id) if steam_id else None,
+            "stats": {
+                "score": g("Score", 0),
+                "goals": g("Goals", 0),
+                "assists": g("Assists", 0),
+                "saves": g("Saves", 0),
+                "shots": g("Shots", 0)
+            }
+        }
+    
+    teams: Dict[str, Dict] = {}
+    if players:
+        teams["0"] = {"id": "0", "score": props.get("Team0Score", 0)}
+        teams["1"] = {"id": "1", "score": props.get("Team1Score", 0)}
+    
+    return {"players": players, "teams": teams}
+
+
+# Propriétés du header lues par process_replay_metadata (via header_props)
+_HEADER_PROPERTY_KEYS = frozenset({"MapName", "GameMode", "MatchType", "Date"})
 
 
 def process_replay_metadata(replay_id: str, raw_data: Dict[str, Any]) -> ReplayDataProcessed:
     """Traite les données JSON brutes pour extraire métadonnées et frames."""
-    print(f"[DEBUG] Traitement des données pour {replay_id}")
+    logger.debug("Traitement des données pour %s", replay_id)
     
     # Initialiser l'objet de données traitées
     processed = ReplayDataProcessed(
@@ -307,42 +367,54 @@ def process_replay_metadata(replay_id: str, raw_data: Dict[str, Any]) -> ReplayD
     
     # Vérifier si nous avons un dictionnaire valide
     if not isinstance(raw_data, dict):
-        print(f"[ERROR] Les données brutes ne sont pas un dictionnaire valide: {type(raw_data)}")
+        logger.error("Les données brutes ne sont pas un dictionnaire valide: %s", type(raw_data))
         return processed
     
     # --- Extraire les métadonnées de base ---
     header = raw_data.get("header", {})
-    print(f"[DEBUG] Header keys: {list(header.keys() if isinstance(header, dict) else [])}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Header keys: %s", list(header.keys() if isinstance(header, dict) else []))
     
     # Extraire les propriétés du header si disponibles
     header_props = {}
     if isinstance(header, dict) and "properties" in header and "elements" in header["properties"]:
-        # Convertir la liste d'éléments en dictionnaire pour un accès plus facile
+        # Convertir en dictionnaire les seules propriétés utiles (la dernière occurrence l'emporte)
         for prop_pair in header["properties"]["elements"]:
-            if isinstance(prop_pair, list) and len(prop_pair) == 2:
+            try:
                 key, value_obj = prop_pair
-                if isinstance(value_obj, dict) and "value" in value_obj:
-                    val_container = value_obj["value"]
-                    # Extraire la valeur du conteneur
-                    if isinstance(val_container, dict) and len(val_container) == 1:
-                        header_props[key] = list(val_container.values())[0]
-                    else:
-                        header_props[key] = val_container
+                if key not in _HEADER_PROPERTY_KEYS:
+                    continue
+                val_container = value_obj["value"]
+            except (TypeError, ValueError, KeyError):
+                continue
+            # Extraire la valeur du conteneur
+            if type(val_container) is dict and len(val_container) == 1:
+                header_props[key] = next(iter(val_container.values()))
+            else:
+                header_props[key] = val_container
     
-    print(f"[DEBUG] Propriétés extraites du header: {list(header_props.keys())}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Propriétés extraites du header: %s", list(header_props.keys()))
     
     # Attributs de base du replay
+    players_and_teams: Dict[str, Dict] = {}
     if "header_size" in raw_data and "properties" in raw_data:
         props = raw_data.get("properties", {})
+        pg = props.get  # Référence locale, utilisée pour chaque propriété
         # Extraire directement les métadonnées des propriétés
-        processed.map_name = props.get("MapName")
+        processed.map_name = pg("MapName")
         processed.game_type = raw_data.get("game_type")  # Déjà au niveau racine
-        processed.match_type = props.get("MatchType")
-        processed.date = props.get("Date")
+        processed.match_type = pg("MatchType")
+        processed.date = pg("Date")
         
         # Durée explicite si disponible
         if "TotalSecondsPlayed" in props:
-            processed.duration = float(props.get("TotalSecondsPlayed", 300.0))
+            processed.duration = float(pg("TotalSecondsPlayed", 300.0))
+        
+        # PlayerStats est l'emplacement canonique des joueurs dans la sortie de rrrocket
+        player_stats = pg("PlayerStats")
+        if type(player_stats) is list:
+            players_and_teams = _players_and_teams_from_player_stats(player_stats, props)
     else:
         # Tenter d'extraire du header_props si disponible
         processed.map_name = header_props.get("MapName")
@@ -351,8 +423,9 @@ def process_replay_metadata(replay_id: str, raw_data: Dict[str, Any]) -> ReplayD
         processed.date = header_props.get("Date")
     
     # --- Extraire les joueurs et les équipes ---
-    # Explorons la structure complète pour comprendre où sont les données
-    players_and_teams = find_players_and_teams(raw_data, 0)
+    # Sans PlayerStats exploitable, explorer la structure complète
+    if not players_and_teams.get("players"):
+        players_and_teams = find_players_and_teams(raw_data, 0)
     
     # Si nous avons trouvé des équipes
     if players_and_teams.get("teams"):
@@ -363,59 +436,62 @@ def process_replay_metadata(replay_id: str, raw_data: Dict[str, Any]) -> ReplayD
             if not team_name:
                 team_name = "Équipe Bleue" if team_id_str == "0" else "Équipe Orange"
             
-            processed.teams[team_id_str] = TeamStats(
+            # Données déjà nettoyées : construct() évite la validation pydantic
+            processed.teams[team_id_str] = TeamStats.construct(
                 id=team_id_str,
-                name=team_name,
-                score=team_data.get("score", 0)
+                name=str(team_name),
+                score=int(team_data.get("score") or 0)
             )
-        print(f"[DEBUG] Équipes extraites: {processed.teams}")
+        logger.debug("Équipes extraites: %s", processed.teams)
     else:
         # Créer des équipes par défaut si aucune n'est trouvée
-        processed.teams["0"] = TeamStats(id="0", name="Équipe Bleue", score=0)
-        processed.teams["1"] = TeamStats(id="1", name="Équipe Orange", score=0)
+        processed.teams["0"] = TeamStats.construct(id="0", name="Équipe Bleue", score=0)
+        processed.teams["1"] = TeamStats.construct(id="1", name="Équipe Orange", score=0)
     
     # Si nous avons trouvé des joueurs
     if players_and_teams.get("players"):
         for player_id, player_data in players_and_teams["players"].items():
+            g = player_data.get  # Référence locale, appelée pour chaque champ
             # Extraire les statistiques du joueur
-            stats_data = player_data.get("stats", {})
-            player_stats = PlayerStatsDetails(
-                score=stats_data.get("score", 0),
-                goals=stats_data.get("goals", 0),
-                assists=stats_data.get("assists", 0),
-                saves=stats_data.get("saves", 0),
-                shots=stats_data.get("shots", 0)
+            stats_data = g("stats", {})
+            sg = stats_data.get
+            player_stats = PlayerStatsDetails.construct(
+                score=int(sg("score") or 0),
+                goals=int(sg("goals") or 0),
+                assists=int(sg("assists") or 0),
+                saves=int(sg("saves") or 0),
+                shots=int(sg("shots") or 0)
             )
             
             # Extraire les données principales du joueur
-            player_name = player_data.get("name", f"Joueur {player_id}")
-            player_team = player_data.get("team", 0)
+            player_name = g("name", f"Joueur {player_id}")
+            player_team = int(g("team") or 0)
             
             # Créer une instance PlayerInfo avec un ID normalisé
-            normalized_id = player_data.get("id", normalize_player_id(player_data))
+            normalized_id = str(g("id")) if "id" in player_data else normalize_player_id(player_data)
             
-            processed.players[normalized_id] = PlayerInfo(
+            processed.players[normalized_id] = PlayerInfo.construct(
                 id=normalized_id,
                 name=player_name,
                 team=player_team,
-                platform=player_data.get("platform"),
-                is_bot=player_data.get("is_bot", False),
-                actor_id=player_data.get("actor_id"),
-                platform_id=player_data.get("platform_id"),
-                epic_id=player_data.get("epic_id"),
-                steam_id=player_data.get("steam_id"),
-                psn_id=player_data.get("psn_id"),
-                xbox_id=player_data.get("xbox_id"),
+                platform=g("platform"),
+                is_bot=bool(g("is_bot", False)),
+                actor_id=g("actor_id"),
+                platform_id=g("platform_id"),
+                epic_id=g("epic_id"),
+                steam_id=g("steam_id"),
+                psn_id=g("psn_id"),
+                xbox_id=g("xbox_id"),
                 stats=player_stats
             )
     
     # Génération de la timeline (simplement des événements de début et fin)
     processed.timeline = [
-        TimelineEvent(type="match_start", time=0.0),
-        TimelineEvent(type="match_end", time=processed.duration)
+        TimelineEvent.construct(type="match_start", time=0.0),
+        TimelineEvent.construct(type="match_end", time=float(processed.duration))
     ]
     
-    print(f"[INFO] Traitement des métadonnées terminé pour {replay_id}")
+    logger.info("Traitement des métadonnées terminé pour %s", replay_id)
     return processed
 
 
@@ -436,5 +512,5 @@ def generate_timeline_events(processed_data: Dict[str, Any], raw_data: Dict[str,
     })
     
     # Trier les événements par temps
-    timeline.sort(key=lambda x: x["time"])
+    timeline.sort(key=_TIME_KEY)
     return timeline 
\ No newline at end of file
@@ -1,5 +1,7 @@
 from typing import Dict, List, Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, Extra
+
+from replay_analyzer.models.replay import TeamStats, PlayerInfo, TimelineEvent
 
 
 class BallState(BaseModel):
@@ -8,6 +10,11 @@ class BallState(BaseModel):
     rotation: List[float] = [0.0, 0.0, 0.0, 1.0]
     velocity: List[float] = [0.0, 0.0, 0.0]
 
+    class Config:
+        # Conteneurs de données purs : pas de champs inattendus, pas de mutation
+        extra = Extra.forbid
+        allow_mutation = False
+
 
 class CarState(BaseModel):
     """État d'une voiture dans une frame."""
@@ -16,6 +23,11 @@ class CarState(BaseModel):
     velocity: Optional[List[float]] = None
     boost: int = 33
 
+    class Config:
+        # Conteneurs de données purs : pas de champs inattendus, pas de mutation
+        extra = Extra.forbid
+        allow_mutation = False
+
 
 class FrameData(BaseModel):
     """Données d'une frame."""
@@ -24,6 +36,11 @@ class FrameData(BaseModel):
     ball: Optional[BallState] = None
     cars: Dict[str, CarState] = {}
 
+    class Config:
+        # Conteneurs de données purs : pas de champs inattendus, pas de mutation
+        extra = Extra.forbid
+        allow_mutation = False
+
 
 class ReplayDataProcessed(BaseModel):
     """Données complètes d'un replay traité."""
@@ -40,9 +57,13 @@ class ReplayDataProcessed(BaseModel):
     car_player_map: Dict[str, str] = {}  # {car_id: player_id}
 
 
+# Résoudre les annotations 'TeamStats', 'PlayerInfo' et 'TimelineEvent'
+ReplayDataProcessed.update_forward_refs()
+
+
 class ProcessingStatus(BaseModel):
     """Statut de traitement d'un replay."""
-    status: str  # "processing", "completed", "failed", "metadata_only"
+    status: str  # "processing", "completed", "failed", "unknown"
     progress: int  # 0-100
     message: Optional[str] = None
     error: Optional[str] = None 
\ No newline at end of file
@@ -1,8 +1,306 @@
 import struct
 import os
-import traceback
-from typing import List, Dict, Any
-import aiofiles
+import mmap
+import asyncio
+import logging
+import tempfile
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+
+logger = logging.getLogger(__name__)
+
+
+MAGIC = b"RLFRAME\0"
+FORMAT_VERSION = 2
+# Versions lisibles: v1 (enregistrements de taille variable) et le format courant
+SUPPORTED_VERSIONS = (1, FORMAT_VERSION)
+
+# Format v2: positions stockées en int16 (unités du jeu x POS_SCALE, soit ±16383 uu
+# à 0.5 uu près, avec de la marge au-delà du terrain standard qui tient dans ±6000)
+# et quaternions en int16 (x QUAT_SCALE)
+POS_SCALE = 2.0
+QUAT_SCALE = 32767.0
+
+# Magic number, version et nombre de frames
+FILE_HEAD = struct.Struct("<8sHI")
+# Format v2: fréquence d'échantillonnage des frames (le delta n'est pas stocké par frame)
+FPS_HEAD = struct.Struct("<f")
+# Format v2: facteur d'échelle des positions quantifiées
+POS_SCALE_HEAD = struct.Struct("<f")
+
+# Valeurs par défaut partagées (tuples immuables, pas de liste allouée par frame)
+_DEFAULT_BALL_POS = (0.0, 0.0, 93.0)
+_DEFAULT_ROT = (0.0, 0.0, 0.0, 1.0)
+_DEFAULT_BALL_VEL = (0.0, 0.0, 0.0)
+_DEFAULT_CAR_POS = (0.0, 0.0, 17.0)
+_EMPTY: Dict[str, Any] = {}
+
+# Taille visée d'un bloc de frames encodé d'un coup dans le fichier projeté
+WRITE_CHUNK_SIZE = 1 << 20
+# Nombre d'IDs dans la table des voitures
+CAR_ID_COUNT = struct.Struct("<H")
+
+# Format v1 (lecture seule): préfixe d'une frame (time, delta, balle, nombre de voitures)
+FRAME_HEAD = struct.Struct("<ff3f4f3fH")
+# Format v1: longueur de l'ID d'une voiture
+CAR_HEAD = struct.Struct("<B")
+# Format v1: position, rotation et boost d'une voiture
+CAR_BODY = struct.Struct("<3f4fB")
+
+def car_dtype() -> np.dtype:
+    """Une voiture dans un enregistrement de frame (emplacement fixe par voiture)."""
+    return np.dtype([
+        ("present", "u1"),  # 1 si la voiture est présente dans la frame
+        ("pos", "<i2", (3,)),
+        ("rot", "<i2", (4,)),
+        ("boost", "u1"),
+    ])
+
+
+def frame_dtype(car_count: int) -> np.dtype:
+    """Enregistrement de taille fixe d'une frame avec `car_count` emplacements de voiture."""
+    return np.dtype([
+        ("time", "<f4"),
+        ("ball_pos", "<i2", (3,)),
+        ("ball_rot", "<i2", (4,)),
+        ("ball_vel", "<f4", (3,)),
+        ("cars", car_dtype(), (car_count,)),
+    ])
+
+
+def _quantize(values: Any, scale: float) -> np.ndarray:
+    """Convertit des coordonnées flottantes en int16 à l'échelle donnée (saturées)."""
+    scaled = np.rint(np.asarray(values, dtype=np.float32) * scale)
+    clipped = np.count_nonzero(np.abs(scaled) > 32767)
+    if clipped:
+        logger.warning("%d coordonnées hors de ±%d saturées lors de la quantification", clipped, int(32767 / scale))
+    return np.clip(scaled, -32767, 32767).astype(np.int16)
+
+
+def _dequantize(values: np.ndarray, scale: float) -> np.ndarray:
+    """Reconvertit des coordonnées int16 en float32."""
+    return values.astype(np.float32) * np.float32(1.0 / scale)
+
+
+def _estimate_fps(times: np.ndarray, deltas: np.ndarray) -> float:
+    """
+    Estime la fréquence nominale des frames à partir des deltas, ou à défaut des timestamps.
+    
+    Sur les timestamps, l'écart médian résiste aux trous laissés par les frames retirées.
+    """
+    total_delta = float(deltas.sum())
+    if total_delta > 0:
+        return len(deltas) / total_delta
+    gaps = np.diff(times.astype(np.float64))
+    gaps = gaps[gaps > 0]
+    if len(gaps):
+        return float(1.0 / np.median(gaps))
+    return 0.0
+
+
+def _open_mmap(path: str) -> mmap.mmap:
+    """
+    Projette un fichier en mémoire en lecture seule.
+    
+    Les pages sont chargées à la demande et partagées avec le cache du système,
+    sans copie complète du fichier dans le processus. La projection reste ouverte
+    tant que des vues numpy y font référence.
+    """
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        return mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+    finally:
+        os.close(fd)
+
+
+def _read_frames_v1(data: bytes, offset: int, frame_count: int) -> List[Dict[str, Any]]:
+    """Décode les frames d'un fichier au format v1 (enregistrements de taille variable)."""
+    frames = []
+    
+    # Vue sans copie sur les données: unpack_from évite d'allouer une tranche par champ
+    mv = memoryview(data)
+    
+    # Lire chaque frame
+    for _ in range(frame_count):
+        (time, delta,
+         bx, by, bz,
+         rx, ry, rz, rw,
+         vx, vy, vz,
+         car_count) = FRAME_HEAD.unpack_from(mv, offset)
+        offset += FRAME_HEAD.size
+        
+        cars = {}
+        for _ in range(car_count):
+            # ID de la voiture
+            id_length = CAR_HEAD.unpack_from(mv, offset)[0]
+            offset += CAR_HEAD.size
+            car_id = bytes(mv[offset:offset+id_length]).decode('utf-8')
+            offset += id_length
+            
+            # Position, rotation et boost
+            px, py, pz, qx, qy, qz, qw, boost = CAR_BODY.unpack_from(mv, offset)
+            offset += CAR_BODY.size
+            
+            cars[car_id] = {
+                "position": [px, py, pz],
+                "rotation": [qx, qy, qz, qw],
+                "boost": boost
+            }
+        
+        # Ajouter la frame
+        frames.append({
+            "time": time,
+            "delta": delta,
+            "ball": {
+                "position": [bx, by, bz],
+                "rotation": [rx, ry, rz, rw],
+                "velocity": [vx, vy, vz]
+            },
+            "cars": cars
+        })
+    
+    return frames
+
+
+def _read_arrays_v2(data: bytes, offset: int, frame_count: int) -> Dict[str, Any]:
+    """
+    Décode un fichier au format v2 en tableaux numpy (SoA).
+    
+    Les positions et rotations sont déquantifiées en float32; les autres
+    tableaux sont de simples vues sur les données.
+    """
+    # Fréquence nominale des frames (delta de la première frame) et échelle des positions
+    fps = FPS_HEAD.unpack_from(data, offset)[0]
+    offset += FPS_HEAD.size
+    pos_scale = POS_SCALE_HEAD.unpack_from(data, offset)[0]
+    offset += POS_SCALE_HEAD.size
+    
+    # Table des IDs de voiture
+    car_id_count = CAR_ID_COUNT.unpack_from(data, offset)[0]
+    offset += CAR_ID_COUNT.size
+    car_ids = []
+    for _ in range(car_id_count):
+        id_length = data[offset]
+        offset += 1
+        car_ids.append(data[offset:offset+id_length].decode('utf-8'))
+        offset += id_length
+    
+    # Toutes les frames ont la même taille: un seul appel suffit
+    records = np.frombuffer(data, dtype=frame_dtype(car_id_count), count=frame_count, offset=offset)
+    cars = records["cars"]
+    
+    # Delta de chaque frame = écart réel avec la précédente (les frames identiques
+    # retirées à l'écriture laissent des écarts irréguliers); 1/fps pour la première
+    times = records["time"]
+    deltas = np.empty(frame_count, dtype=np.float32)
+    if frame_count:
+        deltas[0] = 1.0 / fps if fps > 0 else 0.0
+        deltas[1:] = np.diff(times)
+    
+    return {
+        "times": times,
+        "deltas": deltas,
+        "ball_pos": _dequantize(records["ball_pos"], pos_scale),
+        "ball_rot": _dequantize(records["ball_rot"], QUAT_SCALE),
+        "ball_vel": records["ball_vel"],
+        "car_ids": car_ids,
+        "car_present": cars["present"].view(np.bool_),
+        "car_pos": _dequantize(cars["pos"], pos_scale),
+        "car_rot": _dequantize(cars["rot"], QUAT_SCALE),
+        "car_boost": cars["boost"],
+    }
+
+
+def _arrays_from_frames(frames: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Convertit une liste de frames (dicts) en tableaux numpy (SoA)."""
+    car_ids = list(dict.fromkeys(car_id for frame in frames for car_id in frame["cars"]))
+    car_indices = {car_id: i for i, car_id in enumerate(car_ids)}
+    frame_count = len(frames)
+    
+    car_present = np.zeros((frame_count, len(car_ids)), dtype=bool)
+    car_pos = np.zeros((frame_count, len(car_ids), 3), dtype=np.float32)
+    car_rot = np.zeros((frame_count, len(car_ids), 4), dtype=np.float32)
+    car_boost = np.zeros((frame_count, len(car_ids)), dtype=np.uint8)
+    for i, frame in enumerate(frames):
+        for car_id, car in frame["cars"].items():
+            j = car_indices[car_id]
+            car_present[i, j] = True
+            car_pos[i, j] = car["position"]
+            car_rot[i, j] = car["rotation"]
+            car_boost[i, j] = car["boost"]
+    
+    return {
+        "times": np.array([f["time"] for f in frames], dtype=np.float32),
+        "deltas": np.array([f["delta"] for f in frames], dtype=np.float32),
+        "ball_pos": np.array([f["ball"]["position"] for f in frames], dtype=np.float32).reshape(-1, 3),
+        "ball_rot": np.array([f["ball"]["rotation"] for f in frames], dtype=np.float32).reshape(-1, 4),
+        "ball_vel": np.array([f["ball"]["velocity"] for f in frames], dtype=np.float32).reshape(-1, 3),
+        "car_ids": car_ids,
+        "car_present": car_present,
+        "car_pos": car_pos,
+        "car_rot": car_rot,
+        "car_boost": car_boost,
+    }
+
+
+def frames_from_arrays(arrays: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Reconstruit la liste de frames (dicts) à partir des tableaux numpy (SoA).
+    
+    Adaptateur pour le code qui parcourt encore les frames sous forme de dicts.
+    """
+    # Convertir chaque tableau en listes Python en un seul appel natif,
+    # plutôt que d'accéder aux scalaires numpy élément par élément
+    times = arrays["times"].tolist()
+    deltas = arrays["deltas"].tolist()
+    ball_pos = arrays["ball_pos"].tolist()
+    ball_rot = arrays["ball_rot"].tolist()
+    ball_vel = arrays["ball_vel"].tolist()
+    
+    car_ids = arrays["car_ids"]
+    car_present = arrays["car_present"].tolist()
+    car_pos = arrays["car_pos"].tolist()
+    car_rot = arrays["car_rot"].tolist()
+    car_boost = arrays["car_boost"].tolist()
+    
+    frames = []
+    for i in range(len(times)):
+        present = car_present[i]
+        cars = {
+            car_id: {
+                "position": car_pos[i][j],
+                "rotation": car_rot[i][j],
+                "boost": car_boost[i][j]
+            }
+            for j, car_id in enumerate(car_ids) if present[j]
+        }
+        
+        frames.append({
+            "time": times[i],
+            "delta": deltas[i],
+            "ball": {
+                "position": ball_pos[i],
+                "rotation": ball_rot[i],
+                "velocity": ball_vel[i]
+            },
+            "cars": cars
+        })
+    
+    return frames
+
+
+def _read_header(data):
+    """Vérifie le magic number et retourne (version, nombre de frames, offset)."""
+    magic, version, frame_count = FILE_HEAD.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise ValueError("Format de fichier binaire invalide")
+    
+    if version not in SUPPORTED_VERSIONS:
+        raise ValueError(f"Version de fichier binaire non prise en charge: {version}")
+    
+    return version, frame_count, FILE_HEAD.size
 
 
 class BinaryFramesWriter:
@@ -14,188 +312,240 @@ class BinaryFramesWriter:
         
         Format:
         - Header: "RLFRAME\0" (8 bytes)
-        - Version: 1 (2 bytes, little endian)
+        - Version: 2 (2 bytes, little endian)
         - Frame count: N (4 bytes, little endian)
-        - Pour chaque frame:
+        - FPS: float (4 bytes), fréquence nominale; le delta d'une frame est l'écart avec la précédente
+        - Position scale: float (4 bytes), position réelle = valeur stockée / scale
+        - Car ID count: M (2 bytes)
+        - Pour chaque ID de voiture (l'index dans cette table est l'emplacement de la voiture):
+            - ID length: len(car_id) (1 byte)
+            - ID: car_id (variable)
+        - N frames de taille fixe (frame_dtype(M), 30 + 16 x M bytes chacune):
             - Time: float (4 bytes)
-            - Delta: float (4 bytes)
-            - Ball position: [x, y, z] (3 x 4 bytes)
-            - Ball rotation: [x, y, z, w] (4 x 4 bytes)
+            - Ball position: [x, y, z] (3 x int16, x scale)
+            - Ball rotation: [x, y, z, w] (4 x int16, x 32767)
             - Ball velocity: [x, y, z] (3 x 4 bytes)
-            - Car count: n (2 bytes)
-            - Pour chaque voiture:
-                - ID length: len(car_id) (1 byte)
-                - ID: car_id (variable)
-                - Position: [x, y, z] (3 x 4 bytes)
-                - Rotation: [x, y, z, w] (4 x 4 bytes)
+            - M emplacements de voiture:
+                - Present: 1 si la voiture est dans la frame, sinon 0 (1 byte)
+                - Position: [x, y, z] (3 x int16, x scale)
+                - Rotation: [x, y, z, w] (4 x int16, x 32767)
                 - Boost: (1 byte, 0-255)
         """
         if not frames:
-            print("[WARNING] Aucune frame à sérialiser")
+            logger.warning("Aucune frame à sérialiser")
             return
         
         try:
-            # Ouvrir le fichier en écriture binaire
-            async with aiofiles.open(output_path, 'wb') as f:
-                # Écrire l'en-tête
-                await f.write(b"RLFRAME\0")  # 8 bytes magic number
-                await f.write(struct.pack("<H", 1))  # Version 1, 2 bytes
-                await f.write(struct.pack("<I", len(frames)))  # Nombre de frames, 4 bytes
-                
-                # Écrire chaque frame
-                for frame in frames:
-                    # Time et delta
-                    await f.write(struct.pack("<f", frame.get("time", 0.0)))
-                    await f.write(struct.pack("<f", frame.get("delta", 0.0)))
-                    
-                    # Ball data
-                    ball = frame.get("ball", {})
-                    # Position
-                    ball_pos = ball.get("position", [0.0, 0.0, 93.0])
-                    for coord in ball_pos[:3]:  # Assurer 3 valeurs
-                        await f.write(struct.pack("<f", float(coord)))
-                    
-                    # Rotation
-                    ball_rot = ball.get("rotation", [0.0, 0.0, 0.0, 1.0])
-                    for coord in ball_rot[:4]:  # Assurer 4 valeurs
-                        await f.write(struct.pack("<f", float(coord)))
-                    
-                    # Velocity
-                    ball_vel = ball.get("velocity", [0.0, 0.0, 0.0])
-                    for coord in ball_vel[:3]:  # Assurer 3 valeurs
-                        await f.write(struct.pack("<f", float(coord)))
-                    
-                    # Cars data
-                    cars = frame.get("cars", {})
-                    await f.write(struct.pack("<H", len(cars)))  # Nombre de voitures
-                    
-                    for car_id, car_data in cars.items():
-                        # ID de la voiture (variable)
-                        car_id_bytes = str(car_id).encode('utf-8')
-                        await f.write(struct.pack("<B", len(car_id_bytes)))  # Longueur de l'ID
-                        await f.write(car_id_bytes)  # ID
-                        
-                        # Position
-                        car_pos = car_data.get("position", [0.0, 0.0, 17.0])
-                        for coord in car_pos[:3]:
-                            await f.write(struct.pack("<f", float(coord)))
-                        
-                        # Rotation
-                        car_rot = car_data.get("rotation", [0.0, 0.0, 0.0, 1.0])
-                        for coord in car_rot[:4]:
-                            await f.write(struct.pack("<f", float(coord)))
-                        
-                        # Boost (0-255)
-                        boost = car_data.get("boost", 33)
-                        await f.write(struct.pack("<B", min(255, max(0, int(boost)))))
+            # Collecter les champs en colonnes en un seul passage sur les frames
+            car_indices: Dict[Any, int] = {}
+            times, deltas, ball_pos, ball_rot, ball_vel = [], [], [], [], []
+            car_frame, car_idx, car_pos, car_rot, car_boost = [], [], [], [], []
+            
+            # Méthodes liées une seule fois, hors de la boucle chaude
+            get_car_index = car_indices.get
+            add_car_frame, add_car_idx = car_frame.append, car_idx.append
+            add_car_pos, add_car_rot, add_car_boost = car_pos.append, car_rot.append, car_boost.append
+            
+            for i, frame in enumerate(frames):
+                get = frame.get
+                ball_get = (get("ball") or _EMPTY).get
+                times.append(get("time", 0.0))
+                deltas.append(get("delta", 0.0))
+                ball_pos.append((ball_get("position") or _DEFAULT_BALL_POS)[:3])
+                ball_rot.append((ball_get("rotation") or _DEFAULT_ROT)[:4])
+                ball_vel.append((ball_get("velocity") or _DEFAULT_BALL_VEL)[:3])
                 
-                print(f"[INFO] Fichier binaire écrit avec succès: {output_path}")
+                for car_id, car_data in (get("cars") or _EMPTY).items():
+                    index = get_car_index(car_id)
+                    if index is None:
+                        index = car_indices[car_id] = len(car_indices)
+                    car_get = car_data.get
+                    add_car_frame(i)
+                    add_car_idx(index)
+                    add_car_pos((car_get("position") or _DEFAULT_CAR_POS)[:3])
+                    add_car_rot((car_get("rotation") or _DEFAULT_ROT)[:4])
+                    add_car_boost(car_get("boost", 33))
+            
+            # Placer chaque voiture dans son emplacement [frame, voiture]
+            frame_count, car_count = len(frames), len(car_indices)
+            car_present = np.zeros((frame_count, car_count), dtype=bool)
+            car_pos_arr = np.zeros((frame_count, car_count, 3), dtype=np.float32)
+            car_rot_arr = np.zeros((frame_count, car_count, 4), dtype=np.float32)
+            car_boost_arr = np.zeros((frame_count, car_count), dtype=np.float32)
+            if car_idx:
+                car_present[car_frame, car_idx] = True
+                car_pos_arr[car_frame, car_idx] = car_pos
+                car_rot_arr[car_frame, car_idx] = car_rot
+                car_boost_arr[car_frame, car_idx] = car_boost
+            
+            arrays = {
+                "times": np.asarray(times, dtype=np.float32),
+                "deltas": np.asarray(deltas, dtype=np.float32),
+                "ball_pos": np.asarray(ball_pos, dtype=np.float32),
+                "ball_rot": np.asarray(ball_rot, dtype=np.float32),
+                "ball_vel": np.asarray(ball_vel, dtype=np.float32),
+                "car_ids": list(car_indices),
+                "car_present": car_present,
+                "car_pos": car_pos_arr,
+                "car_rot": car_rot_arr,
+                "car_boost": car_boost_arr,
+            }
         except Exception as e:
-            print(f"[ERROR] Erreur lors de l'écriture du fichier binaire: {e}")
-            traceback.print_exc()
+            logger.exception("Erreur lors de l'écriture du fichier binaire: %s", e)
+            return
+        
+        await BinaryFramesWriter.write_frame_arrays(arrays, output_path)
+    
+    @staticmethod
+    async def write_frame_arrays(arrays: Dict[str, Any], output_path: str):
+        """
+        Écrit des frames fournies sous forme de tableaux numpy (SoA) au format binaire.
+        
+        Même disposition que celle retournée par BinaryFramesReader.read_frame_arrays:
+        times[N], ball_pos[N,3], ball_vel[N,3], car_ids (M IDs), car_present[N,M],
+        car_pos[N,M,3], car_rot[N,M,4] et car_boost[N,M]; deltas[N] et ball_rot[N,4]
+        sont facultatifs. Voir write_frames_to_binary pour le format du fichier.
+        """
+        try:
+            frame_count = len(arrays["times"])
+            if not frame_count:
+                logger.warning("Aucune frame à sérialiser")
+                return
+            
+            # En-tête: table des IDs de voiture, dont l'index est l'emplacement de la voiture
+            times_arr = np.asarray(arrays["times"], dtype=np.float32)
+            deltas = arrays.get("deltas")
+            deltas = np.asarray(deltas, dtype=np.float32) if deltas is not None else np.zeros(0, dtype=np.float32)
+            car_id_bytes = [str(car_id).encode('utf-8') for car_id in arrays["car_ids"]]
+            record_dtype = frame_dtype(len(car_id_bytes))
+            header = bytearray(FILE_HEAD.size + FPS_HEAD.size + POS_SCALE_HEAD.size + CAR_ID_COUNT.size
+                               + sum(1 + len(b) for b in car_id_bytes))
+            FILE_HEAD.pack_into(header, 0, MAGIC, FORMAT_VERSION, frame_count)
+            offset = FILE_HEAD.size
+            FPS_HEAD.pack_into(header, offset, _estimate_fps(times_arr, deltas))
+            offset += FPS_HEAD.size
+            POS_SCALE_HEAD.pack_into(header, offset, POS_SCALE)
+            offset += POS_SCALE_HEAD.size
+            CAR_ID_COUNT.pack_into(header, offset, len(car_id_bytes))
+            offset += CAR_ID_COUNT.size
+            for id_bytes in car_id_bytes:
+                header[offset] = len(id_bytes)
+                offset += 1
+                header[offset:offset+len(id_bytes)] = id_bytes
+                offset += len(id_bytes)
+            
+            ball_pos = arrays["ball_pos"]
+            ball_rot = arrays.get("ball_rot")
+            if ball_rot is None:
+                ball_rot = np.broadcast_to(np.asarray(_DEFAULT_ROT, dtype=np.float32), (frame_count, 4))
+            ball_vel = arrays["ball_vel"]
+            car_present, car_pos, car_rot = arrays["car_present"], arrays["car_pos"], arrays["car_rot"]
+            # Saturation 0-255 en un seul appel vectorisé pour tout le replay
+            car_boost = np.clip(np.asarray(arrays["car_boost"], dtype=np.float32), 0, 255).astype(np.uint8)
+            
+            rows_per_chunk = max(1, WRITE_CHUNK_SIZE // record_dtype.itemsize)
+            
+            def fill_file(fd: int) -> None:
+                # Taille finale connue d'avance: le fichier est préalloué puis projeté
+                # en mémoire, et les frames sont encodées directement dans la projection
+                total_size = len(header) + frame_count * record_dtype.itemsize
+                with os.fdopen(fd, 'wb+') as f:
+                    os.fchmod(f.fileno(), 0o644)  # mkstemp crée le fichier en 0600
+                    os.ftruncate(f.fileno(), total_size)
+                    mm = mmap.mmap(f.fileno(), total_size)
+                    try:
+                        mm[:len(header)] = header
+                        all_records = np.ndarray(frame_count, dtype=record_dtype, buffer=mm, offset=len(header))
+                        # Encodage par blocs pour borner les tableaux temporaires de quantification
+                        for start in range(0, frame_count, rows_per_chunk):
+                            end = min(start + rows_per_chunk, frame_count)
+                            records = all_records[start:end]
+                            records["time"] = times_arr[start:end]
+                            records["ball_pos"] = _quantize(ball_pos[start:end], POS_SCALE)
+                            records["ball_rot"] = _quantize(ball_rot[start:end], QUAT_SCALE)
+                            records["ball_vel"] = ball_vel[start:end]
+                            
+                            cars = records["cars"]
+                            cars["present"] = car_present[start:end]
+                            cars["pos"] = _quantize(car_pos[start:end], POS_SCALE)
+                            cars["rot"] = _quantize(car_rot[start:end], QUAT_SCALE)
+                            cars["boost"] = car_boost[start:end]
+                        # Les vues numpy doivent être libérées avant de fermer la projection
+                        del records, cars, all_records
+                    finally:
+                        mm.close()
+            
+            # Écriture dans un fichier temporaire propre à cet appel, publié d'un bloc une
+            # fois complet : un lecteur concurrent ne voit jamais un fichier à moitié écrit,
+            # et deux écritures du même replay ne partagent pas le même fichier temporaire
+            fd, tmp_path = tempfile.mkstemp(
+                dir=os.path.dirname(output_path) or ".",
+                prefix=f"{os.path.basename(output_path)}.",
+                suffix=".tmp"
+            )
+            loop = asyncio.get_running_loop()
+            try:
+                await loop.run_in_executor(None, fill_file, fd)
+                os.replace(tmp_path, output_path)
+            except BaseException:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+                raise
+            logger.info("Fichier binaire écrit avec succès: %s", output_path)
+        except Exception as e:
+            logger.exception("Erreur lors de l'écriture du fichier binaire: %s", e)
 
 
 class BinaryFramesReader:
     """Classe pour désérialiser les frames depuis un format binaire."""
     
+    @staticmethod
+    async def read_frame_arrays(input_path: str) -> Optional[Dict[str, Any]]:
+        """
+        Lit les frames sous forme de tableaux numpy (SoA), sans créer un dict par frame.
+        
+        Returns:
+            Dictionnaire contenant times[N], deltas[N], ball_pos[N,3], ball_rot[N,4],
+            ball_vel[N,3], car_ids (M IDs), car_present[N,M], car_pos[N,M,3],
+            car_rot[N,M,4] et car_boost[N,M], ou None en cas d'erreur
+        """
+        try:
+            # Projeter le fichier en mémoire dans un thread
+            loop = asyncio.get_running_loop()
+            data = await loop.run_in_executor(None, _open_mmap, input_path)
+            
+            version, frame_count, offset = _read_header(data)
+            logger.info("Lecture de %d frames, version %d", frame_count, version)
+            
+            if version == 1:
+                return _arrays_from_frames(_read_frames_v1(data, offset, frame_count))
+            return _read_arrays_v2(data, offset, frame_count)
+        except Exception as e:
+            logger.exception("Erreur lors de la lecture du fichier binaire: %s", e)
+            return None
+    
     @staticmethod
     async def read_frames_from_binary(input_path: str) -> List[Dict[str, Any]]:
-        """Lit les frames depuis un fichier binaire."""
+        """Lit les frames depuis un fichier binaire (formats v1 et v2)."""
         frames = []
         
         try:
-            # Lire tout le fichier en mémoire
-            async with aiofiles.open(input_path, 'rb') as f:
-                data = await f.read()
-            
-            # Vérifier l'en-tête
-            if not data.startswith(b"RLFRAME\0"):
-                print("[ERROR] Format de fichier binaire invalide")
-                return frames
-            
-            # Lire la version et le nombre de frames
-            offset = 8  # Après le magic number
-            version = struct.unpack("<H", data[offset:offset+2])[0]
-            offset += 2
-            
-            frame_count = struct.unpack("<I", data[offset:offset+4])[0]
-            offset += 4
-            
-            print(f"[INFO] Lecture de {frame_count} frames, version {version}")
-            
-            # Lire chaque frame
-            for _ in range(frame_count):
-                # Time et delta
-                time = struct.unpack("<f", data[offset:offset+4])[0]
-                offset += 4
-                delta = struct.unpack("<f", data[offset:offset+4])[0]
-                offset += 4
-                
-                # Ball data
-                ball_pos = []
-                for _ in range(3):
-                    ball_pos.append(struct.unpack("<f", data[offset:offset+4])[0])
-                    offset += 4
-                
-                ball_rot = []
-                for _ in range(4):
-                    ball_rot.append(struct.unpack("<f", data[offset:offset+4])[0])
-                    offset += 4
-                
-                ball_vel = []
-                for _ in range(3):
-                    ball_vel.append(struct.unpack("<f", data[offset:offset+4])[0])
-                    offset += 4
-                
-                # Cars data
-                car_count = struct.unpack("<H", data[offset:offset+2])[0]
-                offset += 2
-                
-                cars = {}
-                for _ in range(car_count):
-                    # ID de la voiture
-                    id_length = struct.unpack("<B", data[offset:offset+1])[0]
-                    offset += 1
-                    car_id = data[offset:offset+id_length].decode('utf-8')
-                    offset += id_length
-                    
-                    # Position
-                    car_pos = []
-                    for _ in range(3):
-                        car_pos.append(struct.unpack("<f", data[offset:offset+4])[0])
-                        offset += 4
-                    
-                    # Rotation
-                    car_rot = []
-                    for _ in range(4):
-                        car_rot.append(struct.unpack("<f", data[offset:offset+4])[0])
-                        offset += 4
-                    
-                    # Boost
-                    boost = struct.unpack("<B", data[offset:offset+1])[0]
-                    offset += 1
-                    
-                    cars[car_id] = {
-                        "position": car_pos,
-                        "rotation": car_rot,
-                        "boost": boost
-                    }
-                
-                # Ajouter la frame
-                frames.append({
-                    "time": time,
-                    "delta": delta,
-                    "ball": {
-                        "position": ball_pos,
-                        "rotation": ball_rot,
-                        "velocity": ball_vel
-                    },
-                    "cars": cars
-                })
-            
-            print(f"[INFO] {len(frames)} frames lues avec succès depuis {input_path}")
+            # Projeter le fichier en mémoire dans un thread
+            loop = asyncio.get_running_loop()
+            data = await loop.run_in_executor(None, _open_mmap, input_path)
+            
+            version, frame_count, offset = _read_header(data)
+            logger.info("Lecture de %d frames, version %d", frame_count, version)
+            
+            if version == 1:
+                frames = _read_frames_v1(data, offset, frame_count)
+            else:
+                frames = frames_from_arrays(_read_arrays_v2(data, offset, frame_count))
+            
+            logger.info("%d frames lues avec succès depuis %s", len(frames), input_path)
         except Exception as e:
-            print(f"[ERROR] Erreur lors de la lecture du fichier binaire: {e}")
-            traceback.print_exc()
+            logger.exception("Erreur lors de la lecture du fichier binaire: %s", e)
         
-        return frames 
\ No newline at end of file
+        return frames
@@ -10,44 +10,86 @@ import subprocess
 
 def get_prop_value(prop_dict: Dict) -> Any:
     """Extrait la valeur réelle d'une structure de propriété de Rattletrap."""
-    if not isinstance(prop_dict, dict) or 'value' not in prop_dict:
+    if type(prop_dict) is not dict:
         return None
-    val_container = prop_dict['value']
+    val_container = prop_dict.get('value')
     # La valeur réelle est souvent imbriquée (ex: {"int": 5}, {"array": [...]})
-    if isinstance(val_container, dict) and len(val_container) == 1:
-        return list(val_container.values())[0]
+    # next(iter(...)) évite d'allouer une liste à chaque appel
+    if type(val_container) is dict and len(val_container) == 1:
+        return next(iter(val_container.values()))
     return val_container
 
 
+# Priorité des identifiants de joueur: (préfixe, clé, valeurs rejetées)
+_PLAYER_ID_PRIORITY = (
+    ("epic", "epic_id", ()),
+    ("steam", "steam_id", ("0",)),
+    ("psn", "psn_id", ("0",)),
+    ("xbox", "xbox_id", ("0",)),
+    ("platform", "platform_id", ("0",)),
+    ("online", "online_id", ("0",)),
+)
+
+
 def normalize_player_id(player_data: Dict[str, Any]) -> str:
     """
     Génère un identifiant unique et normalisé pour un joueur à partir des informations disponibles.
     Priorité: EpicID > SteamID > PSNID > XboxID > OnlineID > Name
     """
-    # Liste de priorité pour les différents types d'ID
-    epic_id = player_data.get("epic_id")
-    steam_id = player_data.get("steam_id")
-    psn_id = player_data.get("psn_id")
-    xbox_id = player_data.get("xbox_id")
-    platform_id = player_data.get("platform_id")
-    online_id = player_data.get("online_id")
-    player_name = player_data.get("name", "Unknown")
-    
+    g = player_data.get
     # Retourner le premier ID valide selon la priorité
-    if epic_id and epic_id != "":
-        return f"epic_{epic_id}"
-    elif steam_id and steam_id != "0":
-        return f"steam_{steam_id}"
-    elif psn_id and psn_id != "0":
-        return f"psn_{psn_id}"
-    elif xbox_id and xbox_id != "0":
-        return f"xbox_{xbox_id}"
-    elif platform_id and platform_id not in ["0", "", None]:
-        return f"platform_{platform_id}"
-    elif online_id and online_id not in ["0", "", None]:
-        return f"online_{online_id}"
-    else:
-        return f"name_{player_name}"
+    for prefix, key, rejected in _PLAYER_ID_PRIORITY:
+        value = g(key)
+        if value and value not in rejected:
+            return f"{prefix}_{value}"
+    return f"name_{g('name', 'Unknown')}"
+
+
+def player_stats_ids(player_data: Dict[str, Any]) -> Tuple[str, Optional[str]]:
+    """
+    Extrait (epic_id, steam_id) d'une entrée PlayerStats de rrrocket.
+    
+    Le Steam ID provient de OnlineID (plateforme Steam ou inconnue), à défaut
+    du handle NpId ou d'un remote_id Steam dans PlayerID.
+    """
+    player_id = player_data.get("PlayerID")
+    player_id_data = player_id.get("fields") if type(player_id) is dict else None
+    if type(player_id_data) is not dict:
+        player_id_data = {}
+    epic_id = player_id_data.get("EpicAccountId", "")
+    
+    steam_id = None
+    
+    # 1. OnlineID (plus courant pour Steam)
+    online_id = player_data.get("OnlineID", "")
+    if online_id and online_id != "0":
+        platform_type = ""
+        platform = player_data.get("Platform")
+        if isinstance(platform, dict):
+            platform_type = platform.get("value", "").lower()
+        if "steam" in platform_type or not platform_type:
+            steam_id = online_id
+    
+    if not steam_id:
+        # 2. Handle NpId
+        np_id = player_id_data.get("NpId")
+        if isinstance(np_id, dict):
+            np_fields = np_id.get("fields", {})
+            if "Handle" in np_fields and isinstance(np_fields["Handle"], dict):
+                steam_handle = np_fields["Handle"].get("fields", {}).get("Data", "")
+                if steam_handle and steam_handle != "0":
+                    steam_id = steam_handle
+        
+        # 3. Propriétés remote_id avec Steam
+        for prop_value in player_id_data.values():
+            if isinstance(prop_value, dict) and "remote_id" in prop_value:
+                remote_id = prop_value.get("remote_id", {})
+                if isinstance(remote_id, dict) and "Steam" in remote_id:
+                    steam_value = remote_id.get("Steam")
+                    if steam_value and steam_value != "0":
+                        steam_id = steam_value
+    
+    return epic_id, steam_id
 
 
 def get_player_team(player_id: str, players_data: Dict[str, Any]) -> Optional[int]:
@@ -74,6 +116,8 @@ def create_directory_if_not_exists(directory_path: str) -> None:
 
 # Dictionnaire global pour suivre l'état des tâches en arrière-plan
 _background_tasks_status = {}
+# Nombre maximal d'états conservés (les plus anciens sont supprimés)
+BACKGROUND_TASK_STATUS_MAX_ENTRIES = 1024
 
 
 def set_background_task_status(task_id: str, status: Dict[str, Any]) -> None:
@@ -84,7 +128,10 @@ def set_background_task_status(task_id: str, status: Dict[str, Any]) -> None:
         task_id: Identifiant de la tâche
         status: Dictionnaire contenant l'état de la tâche
     """
+    _background_tasks_status.pop(task_id, None)
     _background_tasks_status[task_id] = status
+    while len(_background_tasks_status) > BACKGROUND_TASK_STATUS_MAX_ENTRIES:
+        del _background_tasks_status[next(iter(_background_tasks_status))]
 
 
 def get_background_task_status(task_id: str) -> Optional[Dict[str, Any]]:
@@ -126,26 +173,30 @@ async def run_command(cmd: List[str], output_file: Optional[str] = None) -> Tupl
             stderr.decode('utf-8', errors='replace')
         )
     else:
-        # Pour rediriger la sortie vers un fichier, nous devons utiliser shell=True
-        # avec une string plutôt qu'un tableau d'arguments
-        cmd_str = " ".join(f'"{c}"' if ' ' in c else c for c in cmd)
-        cmd_str += f" > \"{output_file}\""
-        
-        process = await asyncio.create_subprocess_shell(
-            cmd_str,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-            shell=True
-        )
-        
-        stdout, stderr = await process.communicate()
+        # La sortie standard est écrite directement dans le fichier par le processus,
+        # sans transiter par la mémoire de Python
+        with open(output_file, 'wb') as out:
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdout=out,
+                stderr=asyncio.subprocess.PIPE
+            )
+            
+            _, stderr = await process.communicate()
         return (
             process.returncode,
-            stdout.decode('utf-8', errors='replace'),
+            "",
             stderr.decode('utf-8', errors='replace')
         )
 
 
+# Valeurs par défaut partagées par le writer (lues uniquement, jamais modifiées),
+# pour ne pas recréer un dict à chaque frame et à chaque voiture
+_ZERO_XYZ: Dict[str, float] = {'x': 0.0, 'y': 0.0, 'z': 0.0}
+_ZERO_PYR: Dict[str, float] = {'pitch': 0.0, 'yaw': 0.0, 'roll': 0.0}
+_EMPTY: Dict[str, Any] = {}
+
+
 class BinaryFramesWriter:
     """Classe pour écrire des frames dans un format binaire."""
     
@@ -175,6 +226,26 @@ class BinaryFramesWriter:
             frames: Liste des frames à écrire
             output_file: Chemin du fichier de sortie
         """
+        # Les IDs de voiture et de joueur sont identiques d'une frame à l'autre :
+        # on met en cache leur encodage au lieu de le refaire à chaque frame
+        id_cache: Dict[Tuple[Any, Any], bytes] = {}
+        
+        def encode_ids(car_id: Any, player_id: Any) -> bytes:
+            key = (car_id, player_id)
+            packed = id_cache.get(key)
+            if packed is None:
+                # Conversion de l'ID de la voiture en entier
+                car_id_int = int(car_id) if isinstance(car_id, (int, str)) and car_id and str(car_id).isdigit() else 0
+                # Convertir uniquement si c'est un nombre ou une chaîne représentant un nombre
+                try:
+                    player_id_int = int(player_id) if isinstance(player_id, (int, str)) and player_id else 0
+                except ValueError:
+                    # Si la conversion échoue (par exemple avec "unknown"), utiliser 0
+                    player_id_int = 0
+                packed = struct.pack('<HH', car_id_int, player_id_int)
+                id_cache[key] = packed
+            return packed
+        
         with open(output_file, 'wb') as f:
             # Écriture du header
             f.write(b'RLFRAMES')
@@ -191,9 +262,9 @@ class BinaryFramesWriter:
                 f.write(struct.pack('<d', frame.get('time', 0.0)))
                 
                 # Balle
-                ball = frame.get('ball', {})
-                ball_pos = ball.get('position', {'x': 0.0, 'y': 0.0, 'z': 0.0})
-                ball_vel = ball.get('velocity', {'x': 0.0, 'y': 0.0, 'z': 0.0})
+                ball = frame.get('ball', _EMPTY)
+                ball_pos = ball.get('position', _ZERO_XYZ)
+                ball_vel = ball.get('velocity', _ZERO_XYZ)
                 
                 # S'assurer que nous avons des valeurs numériques pour les coordonnées
                 pos_x = float(ball_pos.get('x', 0.0))
@@ -214,38 +285,25 @@ class BinaryFramesWriter:
                     f.write(struct.pack('<H', len(cars)))
                     
                     for car_data in cars:
-                        # Conversion de l'ID de la voiture en entier
-                        car_id_str = car_data.get('id', '0')
-                        car_id_int = int(car_id_str) if isinstance(car_id_str, (int, str)) and car_id_str and car_id_str.isdigit() else 0
-                        
-                        # ID du joueur
-                        player_id = car_data.get('player_id', 0)
-                        # Convertir uniquement si c'est un nombre ou une chaîne représentant un nombre
-                        try:
-                            player_id_int = int(player_id) if isinstance(player_id, (int, str)) and player_id else 0
-                        except ValueError:
-                            # Si la conversion échoue (par exemple avec "unknown"), utiliser 0
-                            player_id_int = 0
-                        
-                        # Écriture des IDs
-                        f.write(struct.pack('<HH', car_id_int, player_id_int))
+                        # Écriture des IDs (encodés une seule fois par voiture)
+                        f.write(encode_ids(car_data.get('id', '0'), car_data.get('player_id', 0)))
                         
                         # Position
-                        pos = car_data.get('position', {'x': 0.0, 'y': 0.0, 'z': 0.0})
+                        pos = car_data.get('position', _ZERO_XYZ)
                         pos_x = float(pos.get('x', 0.0))
                         pos_y = float(pos.get('y', 0.0))
                         pos_z = float(pos.get('z', 0.0))
                         f.write(struct.pack('<fff', pos_x, pos_y, pos_z))
                         
                         # Rotation
-                        rot = car_data.get('rotation', {'pitch': 0.0, 'yaw': 0.0, 'roll': 0.0})
+                        rot = car_data.get('rotation', _ZERO_PYR)
                         pitch = float(rot.get('pitch', 0.0))
                         yaw = float(rot.get('yaw', 0.0))
                         roll = float(rot.get('roll', 0.0))
                         f.write(struct.pack('<fff', pitch, yaw, roll))
                         
                         # Vitesse
-                        vel = car_data.get('velocity', {'x': 0.0, 'y': 0.0, 'z': 0.0})
+                        vel = car_data.get('velocity', _ZERO_XYZ)
                         vel_x = float(vel.get('x', 0.0))
                         vel_y = float(vel.get('y', 0.0))
                         vel_z = float(vel.get('z', 0.0))
@@ -261,37 +319,25 @@ class BinaryFramesWriter:
                     f.write(struct.pack('<H', len(cars)))
                     
                     for car_id, car_data in cars.items():
-                        # Conversion de l'ID de la voiture en entier
-                        car_id_int = int(car_id) if isinstance(car_id, (int, str)) and car_id and str(car_id).isdigit() else 0
-                        
-                        # ID du joueur
-                        player_id = car_data.get('player_id', 0)
-                        # Convertir uniquement si c'est un nombre ou une chaîne représentant un nombre
-                        try:
-                            player_id_int = int(player_id) if isinstance(player_id, (int, str)) and player_id else 0
-                        except ValueError:
-                            # Si la conversion échoue (par exemple avec "unknown"), utiliser 0
-                            player_id_int = 0
-                        
-                        # Écriture des IDs
-                        f.write(struct.pack('<HH', car_id_int, player_id_int))
+                        # Écriture des IDs (encodés une seule fois par voiture)
+                        f.write(encode_ids(car_id, car_data.get('player_id', 0)))
                         
                         # Position
-                        pos = car_data.get('position', {'x': 0.0, 'y': 0.0, 'z': 0.0})
+                        pos = car_data.get('position', _ZERO_XYZ)
                         pos_x = float(pos.get('x', 0.0))
                         pos_y = float(pos.get('y', 0.0))
                         pos_z = float(pos.get('z', 0.0))
                         f.write(struct.pack('<fff', pos_x, pos_y, pos_z))
                         
                         # Rotation
-                        rot = car_data.get('rotation', {'pitch': 0.0, 'yaw': 0.0, 'roll': 0.0})
+                        rot = car_data.get('rotation', _ZERO_PYR)
                         pitch = float(rot.get('pitch', 0.0))
                         yaw = float(rot.get('yaw', 0.0))
                         roll = float(rot.get('roll', 0.0))
                         f.write(struct.pack('<fff', pitch, yaw, roll))
                         
                         # Vitesse
-                        vel = car_data.get('velocity', {'x': 0.0, 'y': 0.0, 'z': 0.0})
+                        vel = car_data.get('velocity', _ZERO_XYZ)
                         vel_x = float(vel.get('x', 0.0))
                         vel_y = float(vel.get('y', 0.0))
                         vel_z = float(vel.get('z', 0.0))
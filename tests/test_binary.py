@@ -0,0 +1,101 @@
+import asyncio
+import logging
+
+import numpy as np
+
+from replay_analyzer.utils.binary import (
+    CAR_BODY,
+    CAR_HEAD,
+    FILE_HEAD,
+    FRAME_HEAD,
+    MAGIC,
+    BinaryFramesReader,
+    BinaryFramesWriter,
+)
+
+
+def frame(time, ball_x, cars):
+    return {
+        "time": time,
+        "delta": 0.5,
+        "ball": {"position": [ball_x, -ball_x, 93.0], "rotation": [0.5, -0.5, 0.5, 0.5], "velocity": [1.5, 0.0, -2.25]},
+        "cars": cars,
+    }
+
+
+def car(x, boost):
+    return {"position": [x, 100.0, 17.0], "rotation": [0.0, 0.0, 0.0, 1.0], "boost": boost}
+
+
+def read_frames(path):
+    return asyncio.run(BinaryFramesReader.read_frames_from_binary(path))
+
+
+def test_v2_round_trip(tmp_path):
+    path = str(tmp_path / "frames.bin")
+    frames = [
+        frame(0.0, 10.25, {"car_1": car(-500.5, 33)}),
+        frame(0.5, 11.0, {"car_1": car(-499.0, 40), "car_2": car(3000.0, 255)}),
+        frame(1.0, 12.75, {"car_2": car(2999.5, 0)}),
+    ]
+
+    asyncio.run(BinaryFramesWriter.write_frames_to_binary(frames, path))
+    read = read_frames(path)
+
+    assert [f["time"] for f in read] == [0.0, 0.5, 1.0]
+    assert np.allclose([f["delta"] for f in read], 0.5)
+    assert [sorted(f["cars"]) for f in read] == [["car_1"], ["car_1", "car_2"], ["car_2"]]
+    for written, decoded in zip(frames, read):
+        assert np.allclose(decoded["ball"]["position"], written["ball"]["position"], atol=0.25)
+        assert np.allclose(decoded["ball"]["rotation"], written["ball"]["rotation"], atol=1 / 32767)
+        assert decoded["ball"]["velocity"] == written["ball"]["velocity"]
+        for car_id, written_car in written["cars"].items():
+            decoded_car = decoded["cars"][car_id]
+            assert np.allclose(decoded_car["position"], written_car["position"], atol=0.25)
+            assert np.allclose(decoded_car["rotation"], written_car["rotation"], atol=1 / 32767)
+            assert decoded_car["boost"] == written_car["boost"]
+
+
+def test_v2_positions_out_of_range_are_clipped(tmp_path, caplog):
+    path = str(tmp_path / "frames.bin")
+    frames = [frame(0.0, 20000.0, {"car": car(-40000.0, 0)})]
+
+    with caplog.at_level(logging.WARNING, logger="replay_analyzer.utils.binary"):
+        asyncio.run(BinaryFramesWriter.write_frames_to_binary(frames, path))
+    read = read_frames(path)
+
+    assert read[0]["ball"]["position"][:2] == [16383.5, -16383.5]
+    assert read[0]["cars"]["car"]["position"][0] == -16383.5
+    assert any("saturées" in record.getMessage() for record in caplog.records)
+
+
+def write_v1(path, frames):
+    data = bytearray(FILE_HEAD.pack(MAGIC, 1, len(frames)))
+    for f in frames:
+        ball = f["ball"]
+        data += FRAME_HEAD.pack(f["time"], f["delta"], *ball["position"], *ball["rotation"], *ball["velocity"], len(f["cars"]))
+        for car_id, c in f["cars"].items():
+            data += CAR_HEAD.pack(len(car_id)) + car_id.encode("utf-8")
+            data += CAR_BODY.pack(*c["position"], *c["rotation"], c["boost"])
+    path.write_bytes(bytes(data))
+
+
+def test_v1_files_are_still_readable(tmp_path):
+    path = tmp_path / "frames.bin"
+    frames = [frame(0.0, 1.5, {"car_1": car(-500.5, 33)}), frame(0.5, 2.5, {})]
+    write_v1(path, frames)
+
+    assert read_frames(str(path)) == frames
+
+    arrays = asyncio.run(BinaryFramesReader.read_frame_arrays(str(path)))
+    assert arrays["car_ids"] == ["car_1"]
+    assert arrays["car_present"].tolist() == [[True], [False]]
+    assert arrays["ball_pos"][:, 0].tolist() == [1.5, 2.5]
+
+
+def test_invalid_magic_is_rejected(tmp_path):
+    path = tmp_path / "frames.bin"
+    path.write_bytes(FILE_HEAD.pack(b"NOTFRAME", 2, 0))
+
+    assert asyncio.run(BinaryFramesReader.read_frame_arrays(str(path))) is None
+    assert read_frames(str(path)) == []
@@ -0,0 +1,164 @@
+import asyncio
+import json
+
+import pytest
+from fastapi import FastAPI, HTTPException
+
+from replay_analyzer.api import background, endpoints
+from replay_analyzer.utils.binary import BinaryFramesReader
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "data").mkdir()
+    monkeypatch.setattr(background, "DATA_DIR_LISTING_TTL", -1)
+    monkeypatch.setattr(background, "background_tasks", {})
+    monkeypatch.setattr(background, "_task_status_expiry", {})
+    return tmp_path / "data"
+
+
+@pytest.fixture
+def get_frames_binary():
+    app = FastAPI()
+    endpoints.setup_routes(app)
+    route = next(route for route in app.routes if route.path == "/replays/{replay_id}/frames.bin")
+    return lambda replay_id: asyncio.run(route.endpoint(replay_id))
+
+
+def rrrocket_output(**extra):
+    properties = {"RecordFPS": 30, "PlayerStats": [{"Name": "Alpha", "Team": 0, "PlayerID": {"fields": {}}}]}
+    return {"header_size": 1234, "properties": properties, **extra}
+
+
+def network_output(frame_count):
+    return rrrocket_output(network_frames=[{"time": i / 30, "ball": {"position": [i, 0, 93]}} for i in range(frame_count)])
+
+
+def fake_rrrocket(tmp_path, raw):
+    async def generate_replay_raw_json(replay_file, replay_id, network_parse=False):
+        json_path = tmp_path / "data" / f"{replay_id}_temp_output.json"
+        json_path.write_text(json.dumps(raw))
+        return str(json_path)
+    return generate_replay_raw_json
+
+
+def test_process_replay_frames_writes_binary_frames(data_dir, monkeypatch):
+    monkeypatch.setattr(endpoints, "generate_replay_raw_json", fake_rrrocket(data_dir.parent, network_output(5)))
+
+    asyncio.run(endpoints.process_replay_frames("replay.replay", "replay"))
+
+    assert background.get_task_status("replay")["status"] == "completed"
+    assert [entry.name for entry in data_dir.iterdir()] == ["replay_frames.bin"]
+    frames = asyncio.run(BinaryFramesReader.read_frame_arrays(str(data_dir / "replay_frames.bin")))
+    assert frames["ball_pos"][:, 0].tolist() == [0, 1, 2, 3, 4]
+
+
+def test_process_replay_frames_reports_failure(data_dir, monkeypatch):
+    monkeypatch.setattr(endpoints, "generate_replay_raw_json", fake_rrrocket(data_dir.parent, rrrocket_output()))
+
+    asyncio.run(endpoints.process_replay_frames("replay.replay", "replay"))
+
+    status = background.get_task_status("replay")
+    assert status["status"] == "failed"
+    assert "Aucune frame" in status["error"]
+    assert list(data_dir.iterdir()) == []
+
+
+def test_frames_binary_route(data_dir, get_frames_binary):
+    with pytest.raises(HTTPException) as missing:
+        get_frames_binary("replay")
+    assert missing.value.status_code == 404
+
+    background.set_task_status("replay", {"status": "processing", "progress": 10})
+    response = get_frames_binary("replay")
+    assert (response.status_code, json.loads(response.body)["progress"]) == (202, 10)
+
+    (data_dir / "replay_frames.bin").write_bytes(b"RLFRAME")
+    response = get_frames_binary("replay")
+    assert response.status_code == 200
+    assert response.media_type == "application/octet-stream"
+    assert response.path == "data/replay_frames.bin"
+
+
+def test_frames_binary_route_reports_failed_task(data_dir, get_frames_binary):
+    background.fail_task("replay", "rrrocket a échoué")
+
+    with pytest.raises(HTTPException) as failed:
+        get_frames_binary("replay")
+    assert (failed.value.status_code, failed.value.detail) == (404, "rrrocket a échoué")
+
+
+def test_task_status_falls_back_to_frames_file(data_dir):
+    assert background.get_task_status("replay")["status"] == "unknown"
+
+    (data_dir / "replay_frames.bin").write_bytes(b"RLFRAME")
+    (data_dir / "replay_meta.json").write_text("{}")
+    assert background.get_task_status("replay") == {"status": "completed", "progress": 100}
+
+
+def test_metadata_cache_evicts_least_recently_used(data_dir, monkeypatch):
+    calls = []
+
+    async def run_command(cmd, output_file=None):
+        calls.append(cmd[-1])
+        with open(output_file, "w") as f:
+            json.dump(rrrocket_output(), f)
+        return 0, "", ""
+
+    monkeypatch.setattr(endpoints, "run_command", run_command)
+    monkeypatch.setattr(endpoints, "_get_process_pool", lambda: None)
+    monkeypatch.setattr(endpoints, "METADATA_CACHE_SIZE", 2)
+    monkeypatch.setattr(endpoints, "_METADATA_CACHE", {})
+    for name in "abc":
+        (data_dir.parent / f"{name}.replay").write_bytes(b"")
+
+    def analyze(name):
+        return asyncio.run(endpoints.analyze_replay_metadata(f"{name}.replay", name))
+
+    analyze("a")
+    analyze("b")
+    analyze("a")
+    analyze("c")
+    assert calls == ["a.replay", "b.replay", "c.replay"]
+    assert [replay_id for replay_id, _ in endpoints._METADATA_CACHE] == ["a", "c"]
+
+    analyze("b")
+    assert calls[-1] == "b.replay"
+    assert [replay_id for replay_id, _ in endpoints._METADATA_CACHE] == ["c", "b"]
+
+
+def test_cached_metadata_is_copied(data_dir, monkeypatch):
+    monkeypatch.setattr(endpoints, "_METADATA_CACHE", {})
+    (data_dir.parent / "a.replay").write_bytes(b"")
+    cache_key = ("a", (data_dir.parent / "a.replay").stat().st_mtime_ns)
+    endpoints._METADATA_CACHE[cache_key] = {"players": [{"id": "p1"}], "teams": {"0": ["p1"]}, "timeline": [], "score": {}}
+
+    metadata = asyncio.run(endpoints.analyze_replay_metadata("a.replay", "a"))
+    metadata["players"][0]["id"] = "changed"
+    metadata["teams"]["0"].append("p2")
+
+    assert endpoints._METADATA_CACHE[cache_key]["players"] == [{"id": "p1"}]
+    assert endpoints._METADATA_CACHE[cache_key]["teams"] == {"0": ["p1"]}
+
+
+def test_task_status_expires(data_dir):
+    background.set_task_status("old", {"status": "completed", "progress": 100})
+    background.set_task_status("new", {"status": "completed", "progress": 100})
+
+    background.schedule_task_status_expiry("old", delay=0)
+    background.schedule_task_status_expiry("new")
+
+    assert "old" not in background.background_tasks
+    assert background.get_task_status("new")["status"] == "completed"
+    assert list(background._task_status_expiry) == ["new"]
+
+
+def test_task_status_is_bounded(data_dir, monkeypatch):
+    monkeypatch.setattr(background, "TASK_STATUS_MAX_ENTRIES", 2)
+    for replay_id in ("a", "b", "c"):
+        background.set_task_status(replay_id, {"status": "processing", "progress": 0})
+        background.schedule_task_status_expiry(replay_id)
+
+    assert list(background.background_tasks) == ["b", "c"]
+    assert list(background._task_status_expiry) == ["b", "c"]
@@ -0,0 +1,99 @@
+import asyncio
+
+import numpy as np
+
+from replay_analyzer.extractors.frames import _parse_car_actor_id, drop_repeated_frames, sample_indices
+from replay_analyzer.utils.binary import BinaryFramesReader, BinaryFramesWriter
+
+
+def frame_arrays(times, ball_x):
+    frame_count = len(times)
+    ball_pos = np.zeros((frame_count, 3), dtype=np.float32)
+    ball_pos[:, 0] = ball_x
+    return {
+        "times": np.asarray(times, dtype=np.float32),
+        "ball_pos": ball_pos,
+        "ball_vel": np.zeros((frame_count, 3), dtype=np.float32),
+        "car_ids": ["car"],
+        "car_present": np.ones((frame_count, 1), dtype=bool),
+        "car_pos": np.zeros((frame_count, 1, 3), dtype=np.float32),
+        "car_rot": np.zeros((frame_count, 1, 4), dtype=np.float32),
+        "car_boost": np.zeros((frame_count, 1), dtype=np.int32),
+    }
+
+
+def test_drop_repeated_frames_keeps_changes_and_bounds():
+    arrays = frame_arrays([0, 1, 2, 3, 4, 5], [0, 1, 1, 1, 1, 1])
+    kept = drop_repeated_frames(arrays)
+
+    assert kept["times"].tolist() == [0, 1, 5]
+    assert kept["ball_pos"][:, 0].tolist() == [0, 1, 1]
+    assert kept["car_ids"] == ["car"]
+
+
+def test_drop_repeated_frames_without_repeats_returns_input():
+    arrays = frame_arrays([0, 1, 2], [0, 1, 2])
+    assert drop_repeated_frames(arrays) is arrays
+
+
+def test_drop_repeated_frames_compares_ball_rotation():
+    arrays = frame_arrays([0, 1, 2, 3], [0, 0, 0, 0])
+    arrays["ball_rot"] = np.zeros((4, 4), dtype=np.float32)
+    arrays["ball_rot"][2, 3] = 1.0
+    kept = drop_repeated_frames(arrays)
+
+    assert kept["times"].tolist() == [0, 2, 3]
+    assert kept["ball_rot"][:, 3].tolist() == [0, 1, 0]
+
+
+def test_deltas_follow_gaps_left_by_dropped_frames(tmp_path):
+    times = [0, 0.5, 1, 1.5, 2, 2.5, 3, 3.5, 4, 4.5]
+    arrays = drop_repeated_frames(frame_arrays(times, [0, 1, 2, 2, 2, 2, 2, 3, 4, 5]))
+    path = str(tmp_path / "frames.bin")
+
+    asyncio.run(BinaryFramesWriter.write_frame_arrays(arrays, path))
+    read = asyncio.run(BinaryFramesReader.read_frame_arrays(path))
+
+    assert read["times"].tolist() == [0, 0.5, 1, 3.5, 4, 4.5]
+    assert np.allclose(read["deltas"], [0.5, 0.5, 0.5, 2.5, 0.5, 0.5])
+
+
+def test_parse_car_actor_id():
+    assert _parse_car_actor_id("car_12") == 12
+    assert _parse_car_actor_id("12") == 12
+    assert _parse_car_actor_id("car_1_2") == 1
+    assert _parse_car_actor_id("car_x") is None
+    assert _parse_car_actor_id("ball") is None
+
+
+def test_concurrent_writes_of_same_replay_do_not_share_temp_file(tmp_path):
+    path = str(tmp_path / "frames.bin")
+    first = frame_arrays([0, 1, 2], [0, 1, 2])
+    second = frame_arrays([0, 1, 2, 3], [3, 4, 5, 6])
+
+    async def write_both():
+        await asyncio.gather(
+            BinaryFramesWriter.write_frame_arrays(first, path),
+            BinaryFramesWriter.write_frame_arrays(second, path),
+        )
+
+    asyncio.run(write_both())
+    read = asyncio.run(BinaryFramesReader.read_frame_arrays(path))
+
+    assert len(read["times"]) in (3, 4)
+    assert [entry.name for entry in tmp_path.iterdir()] == ["frames.bin"]
+
+
+def test_sample_indices_keeps_short_replays():
+    assert sample_indices(np.arange(5.0), max_frames=5).tolist() == [0, 1, 2, 3, 4]
+
+
+def test_sample_indices_follows_time_not_index():
+    # Passage dense (100 frames sur 1 s) puis clairsemé (10 frames sur 9 s)
+    timestamps = np.concatenate([np.linspace(0, 1, 100, endpoint=False), np.arange(1, 11)])
+    indices = sample_indices(timestamps, max_frames=11)
+
+    assert indices[0] == 0 and indices[-1] == len(timestamps) - 1
+    assert np.all(np.diff(indices) > 0)
+    assert len(indices) <= 11
+    assert np.count_nonzero(timestamps[indices] < 1) <= 2
@@ -0,0 +1,164 @@
+import json
+
+from replay_analyzer.api.endpoints import _build_replay_metadata
+from replay_analyzer.extractors.metadata import process_replay_metadata
+from replay_analyzer.models.frames import ReplayDataProcessed
+
+
+PLAYER_STATS = [
+    {
+        "Name": "Alpha",
+        "Team": 0,
+        "OnlineID": "76561198000000001",
+        "Platform": {"kind": "OnlinePlatform", "value": "OnlinePlatform_Steam"},
+        "Score": 320,
+        "Goals": 2,
+        "Saves": 1,
+        "PlayerID": {"fields": {}},
+    },
+    {
+        "Name": "Bravo",
+        "Team": 1,
+        "OnlineID": "0",
+        "Platform": {"kind": "OnlinePlatform", "value": "OnlinePlatform_Epic"},
+        "Score": 150,
+        "Assists": 1,
+        "PlayerID": {"fields": {"EpicAccountId": "abc123"}},
+    },
+    {
+        "Name": "Charlie",
+        "Team": 1,
+        "bBot": True,
+        "PlayerID": {"fields": {}},
+    },
+]
+
+
+def rrrocket_output(**properties):
+    props = {
+        "MapName": "Stadium_P",
+        "MatchType": "Online",
+        "Date": "2024-01-01 12-00-00",
+        "TotalSecondsPlayed": 312.5,
+        "Team0Score": 2,
+        "Team1Score": 1,
+        "PlayerStats": PLAYER_STATS,
+    }
+    props.update(properties)
+    return {"header_size": 1234, "game_type": "TAGame.Replay_Soccar_TA", "properties": props}
+
+
+def test_player_stats_fast_path():
+    processed = process_replay_metadata("replay", rrrocket_output())
+
+    assert processed.map_name == "Stadium_P"
+    assert processed.match_type == "Online"
+    assert processed.game_type == "TAGame.Replay_Soccar_TA"
+    assert processed.duration == 312.5
+    assert set(processed.players) == {"steam_76561198000000001", "epic_abc123", "name_Charlie"}
+
+    alpha = processed.players["steam_76561198000000001"]
+    assert (alpha.name, alpha.team, alpha.stats.score, alpha.stats.goals, alpha.stats.saves) == ("Alpha", 0, 320, 2, 1)
+    assert processed.players["name_Charlie"].is_bot is True
+
+    assert {team_id: team.score for team_id, team in processed.teams.items()} == {"0": 2, "1": 1}
+    assert [(event.type, event.time) for event in processed.timeline] == [("match_start", 0.0), ("match_end", 312.5)]
+
+
+def test_player_ids_match_endpoint_metadata(tmp_path):
+    raw = rrrocket_output()
+    json_path = tmp_path / "output.json"
+    json_path.write_text(json.dumps(raw))
+
+    endpoint_ids = [player["id"] for player in _build_replay_metadata(str(json_path), "replay", "replay.replay")["players"]]
+    assert list(process_replay_metadata("replay", raw).players) == endpoint_ids
+
+
+def test_falls_back_to_structure_walk_without_player_stats():
+    raw = {
+        "header_size": 1234,
+        "properties": {"MapName": "Park_P"},
+        "extra": {"players": [{"id": "p1", "name": "Delta", "team": 1}]},
+    }
+    processed = process_replay_metadata("replay", raw)
+
+    assert processed.map_name == "Park_P"
+    assert list(processed.players) == ["p1"]
+    assert processed.players["p1"].team == 1
+
+
+def header_property(key, kind, value):
+    return [key, {"kind": kind, "value": value}]
+
+
+def test_header_properties_last_occurrence_wins():
+    raw = {
+        "game_type": "TAGame.Replay_Soccar_TA",
+        "header": {
+            "properties": {
+                "elements": [
+                    header_property("MapName", "NameProperty", {"name": "Stadium_P"}),
+                    header_property("MatchType", "NameProperty", {"name": "Online"}),
+                    header_property("Date", "StrProperty", {"str": "2024-01-01"}),
+                    header_property("NumFrames", "IntProperty", {"int": 9000}),
+                    "malformed",
+                    header_property("MapName", "NameProperty", {"name": "Park_P"}),
+                ]
+            }
+        },
+    }
+    processed = process_replay_metadata("replay", raw)
+
+    assert processed.map_name == "Park_P"
+    assert processed.match_type == "Online"
+    assert processed.date == "2024-01-01"
+    assert processed.game_type == "TAGame.Replay_Soccar_TA"
+
+
+def test_constructed_models_match_validated_models():
+    raw = {
+        "header_size": 1234,
+        "properties": {"TotalSecondsPlayed": "300"},
+        "extra": {
+            "players": [{"id": 7, "name": "Echo", "team": "1", "is_bot": 0, "stats": {"score": "120", "goals": None}}],
+            "teams": [{"id": 1, "name": "Orange", "score": "3"}],
+        },
+    }
+    processed = process_replay_metadata("replay", raw)
+
+    assert processed.dict() == ReplayDataProcessed(**processed.dict()).dict()
+    echo = processed.players["7"]
+    assert (echo.id, echo.team, echo.is_bot, echo.stats.score, echo.stats.goals) == ("7", 1, False, 120, 0)
+    assert processed.teams["1"].score == 3
+
+
+def test_player_id_is_normalized_only_without_explicit_id():
+    raw = {
+        "header_size": 1234,
+        "properties": {},
+        "extra": [
+            {"id": "custom", "name": "Foxtrot", "team": 0, "steam_id": "42"},
+            {"name": "Golf", "team": 1, "steam_id": "43"},
+            {"name": "Hotel", "team": 1},
+        ],
+    }
+    processed = process_replay_metadata("replay", raw)
+
+    assert list(processed.players) == ["custom", "steam_43", "name_Hotel"]
+
+
+def test_team_scores_come_from_team_score_properties():
+    processed = process_replay_metadata("replay", rrrocket_output(Team0Score=4, Team1Score=5, BlueScore=9, OrangeScore=9))
+    assert {team_id: team.score for team_id, team in processed.teams.items()} == {"0": 4, "1": 5}
+
+    processed = process_replay_metadata("replay", rrrocket_output(Team0Score=None, BlueScore=9))
+    assert processed.teams["0"].score == 0
+
+
+def test_endpoint_scores_come_from_team_score_properties(tmp_path):
+    json_path = tmp_path / "output.json"
+    json_path.write_text(json.dumps(rrrocket_output(Team0Score=1, Team1Score=3, BlueScore=9, OrangeScore=9)))
+
+    metadata = _build_replay_metadata(str(json_path), "replay", "replay.replay")
+    assert (metadata["team0_score"], metadata["team1_score"]) == (1, 3)
+    assert metadata["score"] == {"blue": 1, "orange": 3, "winner": "orange"}
@@ -66,7 +66,7 @@ export interface TimelineEvent {
 }
 
 export interface ProcessingStatus {
-  status: "processing" | "completed" | "failed" | "metadata_only";
+  status: "processing" | "completed" | "failed" | "unknown";
   progress: number;
   message?: string;
   error?: string;